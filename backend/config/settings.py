@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -143,6 +144,32 @@ REST_FRAMEWORK = {
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Response cache for report/summary endpoints (core.cache). Entries are keyed on
+# per-user data versions stored in the database, so they never go stale; 'locmem'
+# is per process, 'file' shares entries between workers.
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'locmem')
+
+# Single-debt settlement: 'locking' (row lock in a transaction) or 'optimistic'
+# (versioned conditional UPDATE with bounded retry); see debts.settlement
+DEBT_SETTLEMENT_STRATEGY = os.environ.get('DEBT_SETTLEMENT_STRATEGY', 'locking')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.response_cache',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    } if RESPONSE_CACHE_BACKEND == 'file' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from core.views import CacheStatsView, DashboardView, SearchView
 from finance.views import CategoryViewSet, ItemViewSet, DailyExpenseViewSet
-from debts.views import DebtViewSet
+from debts.views import DebtViewSet, CounterpartyViewSet
 from emis.views import EMIViewSet, InstallmentViewSet
 
 router = DefaultRouter()
@@ -10,11 +11,15 @@ router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'items', ItemViewSet, basename='item')
 router.register(r'daily-expenses', DailyExpenseViewSet, basename='daily-expense')
 router.register(r'debts', DebtViewSet, basename='debt')
+router.register(r'counterparties', CounterpartyViewSet, basename='counterparty')
 router.register(r'emis', EMIViewSet, basename='emi')
 router.register(r'installments', InstallmentViewSet, basename='installment')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('core.urls')),
+    path('api/cache-stats/', CacheStatsView.as_view(), name='cache_stats'),
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('api/search/', SearchView.as_view(), name='search'),
     path('api/', include(router.urls)),
 ]
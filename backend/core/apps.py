@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from django.db.models.signals import post_delete
+        from .cache import drop_data_versions
+        post_delete.connect(drop_data_versions, sender=User, dispatch_uid='drop-data-versions')
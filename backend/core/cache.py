@@ -0,0 +1,175 @@
+"""
+Versioned per-user response cache.
+
+Cache keys combine the user, the user's DataVersion for every module the view
+reads and the normalized query string. Writes bump the version inside their
+own transaction (see `track_model_changes` / `bump_data_version`), so stale
+entries are simply never looked up again and expire on their own.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import DataVersion
+
+CACHE_ALIAS = 'responses'
+
+# Names of decorated views, for reporting hit/miss counters
+_cached_views = set()
+
+
+def response_cache():
+    return caches[CACHE_ALIAS]
+
+
+def bump_data_version(user_id, module):
+    """Invalidate every cached response of `module` for the user"""
+    if user_id is None:
+        return
+    updated = DataVersion.objects.filter(user_id=user_id, module=module).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(user_id=user_id, module=module, version=2)
+        except IntegrityError:
+            # Created concurrently; bump the row that won
+            DataVersion.objects.filter(user_id=user_id, module=module).update(
+                version=F('version') + 1, updated_at=timezone.now()
+            )
+
+
+def get_data_state(request, modules):
+    """
+    ({module: version}, last write time or None) for the requesting user.
+    Versions default to 1 for modules never written. Memoized on the request so
+    the conditional-GET check and the response cache share one query.
+    """
+    memo = request.__dict__.setdefault('_data_state', {})
+    modules = tuple(sorted(modules))
+    if modules not in memo:
+        rows = DataVersion.objects.filter(
+            user_id=request.user.pk, module__in=modules
+        ).values_list('module', 'version', 'updated_at')
+        versions = {module: 1 for module in modules}
+        last_modified = None
+        for module, version, updated_at in rows:
+            versions[module] = version
+            last_modified = updated_at if last_modified is None else max(last_modified, updated_at)
+        memo[modules] = (versions, last_modified)
+    return memo[modules]
+
+
+def track_model_changes(module, user_attrs):
+    """
+    Bump `module`'s version whenever one of the models is saved or deleted.
+    `user_attrs` maps each model to the dotted attribute holding its owner's id,
+    e.g. {Settlement: 'debt.user_id'}.
+    """
+    for model, path in user_attrs.items():
+        def bump(sender, instance, path=path, **kwargs):
+            owner = instance
+            for attr in path.split('.'):
+                owner = getattr(owner, attr, None)
+                if owner is None:
+                    return
+            bump_data_version(owner, module)
+
+        uid = f'data-version-{module}-{model._meta.label_lower}'
+        post_save.connect(bump, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(bump, sender=model, weak=False, dispatch_uid=uid)
+
+
+def drop_data_versions(sender, instance, **kwargs):
+    """
+    Deleting a user cascades through tracked models whose signals bump (and so
+    may re-create) the user's DataVersion rows; remove them once the user is gone.
+    """
+    DataVersion.objects.filter(user_id=instance.pk).delete()
+
+
+def normalized_params(query_params):
+    """Order-insensitive representation of the query string"""
+    return '&'.join(
+        f'{key}={value}'
+        for key in sorted(query_params)
+        for value in sorted(query_params.getlist(key))
+    )
+
+
+def response_cache_key(view_name, user_id, versions, query_params, extra=''):
+    params = hashlib.md5(f'{normalized_params(query_params)}|{extra}'.encode()).hexdigest()
+    version_part = '.'.join(f'{module}{version}' for module, version in sorted(versions.items()))
+    return f'resp:{view_name}:{user_id}:{version_part}:{params}'
+
+
+def _count(view_name, outcome):
+    cache = response_cache()
+    key = f'stats:{outcome}:{view_name}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def cache_stats():
+    cache = response_cache()
+    stats = {}
+    for view_name in sorted(_cached_views):
+        hits = cache.get(f'stats:hit:{view_name}', 0)
+        misses = cache.get(f'stats:miss:{view_name}', 0)
+        total = hits + misses
+        stats[view_name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+def cached_response(*modules, timeout=None):
+    """
+    Cache successful DRF responses of a viewset method per user.
+    Anything other than a 200 `Response` (errors, streaming exports) passes through.
+    """
+    def decorator(view_method):
+        view_name = view_method.__qualname__
+        _cached_views.add(view_name)
+
+        @wraps(view_method)
+        def wrapper(viewset, request, *args, **kwargs):
+            versions, _ = get_data_state(request, modules)
+            # Day-relative figures (aging, default months) must not outlive the day, and
+            # a format negotiated through the Accept header is not in the query string
+            key = response_cache_key(
+                view_name, request.user.pk, versions, request.query_params,
+                extra=f'{sorted(kwargs.items())!r}|{request.accepted_renderer.format}|{timezone.now().date()}',
+            )
+            cache = response_cache()
+
+            data = cache.get(key)
+            if data is not None:
+                _count(view_name, 'hit')
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _count(view_name, 'miss')
+            response = view_method(viewset, request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                if timeout is None:
+                    cache.set(key, response.data)
+                else:
+                    cache.set(key, response.data, timeout)
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
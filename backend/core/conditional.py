@@ -0,0 +1,84 @@
+"""
+Conditional GET (ETag / Last-Modified) for viewsets.
+
+The validators come from the per-user DataVersion rows, not from the rendered
+body, so an `If-None-Match` hit is answered with 304 after a single indexed
+query and before the view runs any aggregation.
+"""
+import hashlib
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_data_state, normalized_params
+
+
+class NotModified(Exception):
+    """Raised from `initial()` to skip the handler when the client copy is current"""
+
+
+class ConditionalGetMixin:
+    """
+    Adds strong ETags and Last-Modified to every GET/HEAD of the viewset and
+    answers matching If-None-Match / If-Modified-Since with 304.
+    `data_modules` lists the DataVersion modules the viewset's responses read.
+    """
+    data_modules = ()
+
+    def initial(self, request, *args, **kwargs):
+        # Runs after authentication and permission checks, before the handler
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method in ('GET', 'HEAD') and self.data_modules:
+            self._validators = self.get_validators(request)
+            if self.is_not_modified(request, *self._validators):
+                raise NotModified()
+
+    def get_validators(self, request):
+        versions, last_modified = get_data_state(request, self.data_modules)
+        # Some fields (days_pending, default year/month) depend on the current day
+        today = timezone.now().date()
+        fingerprint = '|'.join([
+            self.__class__.__name__,
+            str(getattr(self, 'action', None)),
+            str(request.user.pk),
+            repr(sorted(versions.items())),
+            normalized_params(request.query_params),
+            repr(sorted(self.kwargs.items())),
+            request.accepted_renderer.format,
+            request.get_host(),
+            today.isoformat(),
+        ])
+        etag = '"%s"' % hashlib.sha1(fingerprint.encode()).hexdigest()
+
+        day_start = datetime.combine(today, time.min, tzinfo=dt_timezone.utc)
+        last_modified = max(last_modified, day_start) if last_modified else day_start
+        return etag, last_modified
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # If-None-Match uses the weak comparison function
+            candidates = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+            return '*' in candidates or etag in candidates
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+        return if_modified_since is not None and int(last_modified.timestamp()) <= if_modified_since
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        validators = getattr(self, '_validators', None)
+        if validators and (200 <= response.status_code < 300 or response.status_code == 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+            response['Cache-Control'] = 'private, no-cache'
+            patch_vary_headers(response, ['Authorization'])
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,98 @@
+"""
+Dashboard KPIs.
+
+Each section is one or two indexed reads against a different app's tables.
+They run one after the other on the request's connection: a few milliseconds
+each, less than handing them to worker threads that need their own
+connections.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from debts.models import Debt
+from emis.due import pending_installments
+from emis.models import EMI
+from finance.models import ExpenseRollup
+
+TOP_CATEGORIES = 5
+DUE_WINDOW_DAYS = 7
+
+ZERO = Decimal('0.00')
+
+
+def finance_section(user_id, today):
+    """Month-to-date spend and the biggest categories of the month"""
+    month = ExpenseRollup.objects.filter(
+        user_id=user_id, date__gte=today.replace(day=1), date__lte=today
+    )
+    top = (
+        month.values('category_id', category_label=F('category__name'))
+        .annotate(category_total=Sum('total'))
+        .order_by('-category_total')[:TOP_CATEGORIES]
+    )
+    return {
+        'month_to_date': float(month.aggregate(total=Sum('total'))['total'] or ZERO),
+        'top_categories': [
+            {'id': row['category_id'], 'name': row['category_label'], 'total': float(row['category_total'])}
+            for row in top
+        ],
+    }
+
+
+def debts_section(user_id, today):
+    """Outstanding balances owed to / by the user in one aggregate"""
+    pending = Q(status=Debt.PENDING)
+    totals = Debt.objects.filter(user_id=user_id).aggregate(
+        receivable=Coalesce(
+            Sum('outstanding', filter=pending & Q(type=Debt.GIVEN)), ZERO
+        ),
+        payable=Coalesce(
+            Sum('outstanding', filter=pending & Q(type=Debt.BORROWED)), ZERO
+        ),
+        pending_count=Count('id', filter=pending),
+    )
+    return {
+        'receivable': float(totals['receivable']),
+        'payable': float(totals['payable']),
+        'net_position': float(totals['receivable'] - totals['payable']),
+        'pending_count': totals['pending_count'],
+    }
+
+
+def emis_section(user_id, today):
+    """Active EMI count, installments due this week and the overdue backlog"""
+    # One range scan up to the end of the week covers both the overdue and the upcoming ones
+    rows = pending_installments(user_id, end=today + timedelta(days=DUE_WINDOW_DAYS - 1))
+    overdue = [row for row in rows if row['due_date'] < today]
+    return {
+        'active_count': EMI.objects.filter(user_id=user_id, status=EMI.ACTIVE).count(),
+        'due_this_week': [
+            {**row, 'amount': float(row['amount'])}
+            for row in rows if row['due_date'] >= today
+        ],
+        'overdue_count': len(overdue),
+        'overdue_total': float(sum(row['amount'] for row in overdue)),
+    }
+
+
+SECTIONS = {
+    'finance': finance_section,
+    'debts': debts_section,
+    'emis': emis_section,
+}
+
+
+def build_dashboard(user_id):
+    """({section: data}, {section: milliseconds})"""
+    today = timezone.now().date()
+    data, timings = {}, {}
+    for name, section in SECTIONS.items():
+        started = time.perf_counter()
+        data[name] = section(user_id, today)
+        timings[name] = (time.perf_counter() - started) * 1000
+    return data, timings
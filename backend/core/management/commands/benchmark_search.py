@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.views import SearchView
+from debts.models import Counterparty
+
+SYLLABLES = ['al', 'an', 'ar', 'be', 'ca', 'da', 'el', 'fa', 'go', 'ha', 'is', 'jo', 'ka', 'li',
+             'ma', 'ne', 'or', 'pa', 'ra', 'sa', 'ta', 'um', 've', 'wi', 'ya', 'zo', 'é', 'ö']
+
+
+class Command(BaseCommand):
+    help = 'Measure /api/search/ latency percentiles on synthetic counterparties (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--names', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            user = User.objects.create(username=f"bench-{time.time_ns()}")
+            names = self._names(rng, options['names'])
+            Counterparty.objects.bulk_create(
+                [Counterparty(user=user, name=name) for name in names], batch_size=5000
+            )
+            self.stdout.write(f"{len(names)} counterparties")
+
+            view = SearchView.as_view()
+            factory = APIRequestFactory()
+
+            def run(params):
+                request = factory.get('/api/search/', {'types': 'persons', **params}, HTTP_HOST='localhost')
+                force_authenticate(request, user=user)
+                began = time.perf_counter()
+                response = view(request)
+                elapsed = (time.perf_counter() - began) * 1000
+                assert response.status_code == 200, response.data
+                return elapsed
+
+            # The first fuzzy query builds the in-process trigram index
+            self.stdout.write(f"trigram index build      {run({'q': 'x', 'fuzzy': 'true'}):9.1f} ms")
+
+            for label, params in (('prefix', {}), ('prefix+fuzzy', {'fuzzy': 'true'})):
+                timings = sorted(
+                    run({'q': self._query(rng, names, fuzzy=bool(params)), **params})
+                    for _ in range(options['queries'])
+                )
+                self.stdout.write(
+                    f"{label:13} p50 {self._percentile(timings, 50):6.2f} ms   "
+                    f"p99 {self._percentile(timings, 99):6.2f} ms   max {timings[-1]:6.2f} ms"
+                )
+
+            transaction.set_rollback(True)
+
+    def _names(self, rng, count):
+        names = set()
+        while len(names) < count:
+            first = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+            last = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+            names.add(f"{first} {last}")
+        return sorted(names)
+
+    def _query(self, rng, names, fuzzy):
+        name = rng.choice(names)
+        query = name[:rng.randint(2, 6)]
+        if fuzzy and len(query) > 3:
+            # A typo: drop one character
+            cut = rng.randrange(1, len(query))
+            query = query[:cut] + query[cut + 1:]
+        return query
+
+    def _percentile(self, timings, percent):
+        return timings[min(len(timings) - 1, int(len(timings) * percent / 100))]
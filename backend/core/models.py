@@ -1,3 +1,28 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class DataVersion(models.Model):
+    """
+    Per-user, per-module counter bumped in the same transaction as every write.
+    Cached responses are keyed on it, so a bump invalidates them without a scan.
+    """
+    FINANCE = 'finance'
+    DEBTS = 'debts'
+    EMIS = 'emis'
+    MODULE_CHOICES = [
+        (FINANCE, 'Finance'),
+        (DEBTS, 'Debts'),
+        (EMIS, 'EMIs'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    module = models.CharField(max_length=20, choices=MODULE_CHOICES)
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'module')
+
+    def __str__(self):
+        return f"{self.user_id}/{self.module} v{self.version}"
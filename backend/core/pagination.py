@@ -0,0 +1,197 @@
+"""
+Keyset (cursor) pagination.
+
+Unlike PageNumberPagination there is no COUNT(*) and no OFFSET: the cursor
+holds the sort key of the last row served and the next page is fetched with a
+lexicographic "row after this key" filter, so deep pages cost the same as the
+first one when a matching composite index exists.
+"""
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import GeneratedField, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+def _encode_key_value(value):
+    # Full precision: DjangoJSONEncoder would truncate datetimes to milliseconds
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+
+class KeysetPagination(BasePagination):
+    """
+    Views declare `keyset_ordering`, e.g. ('-date', '-id'). Every entry must be a
+    model field or annotation present on the queryset, and the full tuple must be
+    unique (end with the primary key). Keys must not be NULL.
+    """
+    page_size = 100
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position, reverse = self.start(request, view)
+        ordering = self.directed_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            position = self.parse_key(position, self.key_fields(queryset.model, queryset.query.annotations))
+            queryset = queryset.filter(self.after(ordering, position))
+        return self.page(list(queryset[:self.page_size + 1]), position, reverse)
+
+    def paginate_sequence(self, rows, request, view=None):
+        """
+        `paginate_queryset` for an in-memory list already sorted by the ordering.
+        Keys of model instances are converted by their fields; dict rows are compared
+        as decoded from the cursor, so their keys must be numbers or strings.
+        """
+        position, reverse = self.start(request, view)
+        ordering = self.directed_ordering(reverse)
+        if reverse:
+            rows = rows[::-1]
+        if position is not None and rows:
+            if hasattr(rows[0], '_meta'):
+                position = self.parse_key(position, self.key_fields(rows[0]._meta.model))
+            try:
+                rows = [row for row in rows if self.is_after(ordering, self.key_of(row), position)]
+            except TypeError:
+                raise NotFound('Invalid cursor')
+        return self.page(rows[:self.page_size + 1], position, reverse)
+
+    def start(self, request, view):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+        return self.decode_cursor(request)
+
+    def directed_ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def page(self, rows, position, reverse):
+        """Trim the page_size + 1 fetched rows and record what lies on either side"""
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going forward, "more" means a next page; coming back it means a previous one
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.first_key = self.key_of(rows[0]) if rows else None
+        self.last_key = self.key_of(rows[-1]) if rows else None
+        return rows
+
+    def is_after(self, ordering, key, position):
+        for field, value, bound in zip(ordering, key, position):
+            if value != bound:
+                return value < bound if field.startswith('-') else value > bound
+        return False
+
+    def after(self, ordering, position):
+        """Q for rows strictly after `position` in `ordering` (row-value comparison)"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        # Redundant bound on the leading column lets the index seek instead of scan
+        first = ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': position[0]}) & condition
+
+    def key_fields(self, model, annotations=None):
+        """The model field or annotation output field behind each ordering entry"""
+        annotations = annotations or {}
+        fields = []
+        for name in (field.lstrip('-') for field in self.ordering):
+            if name in annotations:
+                fields.append(annotations[name].output_field)
+            else:
+                field = model._meta.get_field(name)
+                # Generated columns convert values through their output field
+                fields.append(field.output_field if isinstance(field, GeneratedField) else field)
+        return fields
+
+    def parse_key(self, position, fields):
+        """Cursor values as the fields' Python types; a value that does not convert is a bad cursor"""
+        try:
+            key = [field.to_python(value) for field, value in zip(fields, position)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if None in key:
+            raise NotFound('Invalid cursor')
+        return key
+
+    def key_of(self, row):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, key, reverse=False):
+        payload = json.dumps({'k': key, 'r': int(reverse)}, default=_encode_key_value)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            key, reverse = payload['k'], bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(key, list) or len(key) != len(self.ordering):
+            raise NotFound('Invalid cursor')
+        return key, reverse
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(self.last_key)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_key is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first_key, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
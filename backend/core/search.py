@@ -0,0 +1,132 @@
+"""
+Name search for typeahead pickers.
+
+Names are stored next to a normalized key (case-folded, accents stripped,
+whitespace collapsed). Prefix matches are index range scans on that key; the
+optional fuzzy mode ranks names by trigram overlap using an in-process index
+built once per user and data version.
+"""
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from django.db import models
+
+
+def normalize_name(text):
+    """'  Zoë   O’Brien ' -> 'zoe o’brien'"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+class SearchKeyField(models.CharField):
+    """
+    Normalized copy of another field of the same model, filled on every save
+    (including bulk_create). `source` names the field it mirrors.
+    """
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 100)
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_name(getattr(model_instance, self.source))[:self.max_length]
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def prefix_filter(queryset, field, query):
+    """
+    Rows whose normalized `field` starts with the normalized query.
+    The explicit range lets any B-tree index on (user, field) serve the match;
+    the `startswith` keeps it exact under collations that reorder characters.
+    """
+    prefix = normalize_name(query)
+    return queryset.filter(**{
+        f'{field}__gte': prefix,
+        f'{field}__lt': prefix + '\U0010ffff',
+        f'{field}__startswith': prefix,
+    })
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Posting lists of trigram -> entry positions over a fixed list of (id, name)
+    entries. Postings are NumPy arrays so a query is a bincount, not a Python loop.
+    """
+
+    def __init__(self, entries):
+        ids, names, sizes, postings = [], [], [], {}
+        for position, (entry_id, name) in enumerate(entries):
+            grams = trigrams(normalize_name(name))
+            ids.append(entry_id)
+            names.append(name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.ids = ids
+        self.names = names
+        self.sizes = np.array(sizes, dtype=np.int32)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+    def search(self, query, limit=10, threshold=0.5):
+        """
+        [(entry_id, name, score)] best first. The score is the share of the query's
+        trigrams found in the name (so short typed prefixes still match long names);
+        ties go to the closer overall match.
+        """
+        grams = trigrams(normalize_name(query))
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.ids))
+        candidates = np.flatnonzero(shared >= threshold * len(grams))
+        if not len(candidates):
+            return []
+        common = shared[candidates]
+        coverage = common / len(grams)
+        similarity = common / (len(grams) + self.sizes[candidates] - common)
+        # Best `limit` by coverage, then similarity; position breaks remaining ties
+        order = np.lexsort((candidates, -similarity, -coverage))[:limit]
+        return [
+            (self.ids[position], self.names[position], round(float(score), 3))
+            for position, score in zip(candidates[order], coverage[order])
+        ]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+MAX_TRIGRAM_INDEXES = 64
+
+
+def trigram_index(cache_key, load_entries):
+    """
+    Shared TrigramIndex for `cache_key` (include the data version so writes
+    produce a new key); `load_entries` is only called on a miss.
+    """
+    with _indexes_lock:
+        index = _indexes.get(cache_key)
+        if index is not None:
+            _indexes.move_to_end(cache_key)
+            return index
+    index = TrigramIndex(load_entries())
+    with _indexes_lock:
+        _indexes[cache_key] = index
+        while len(_indexes) > MAX_TRIGRAM_INDEXES:
+            _indexes.popitem(last=False)
+    return index
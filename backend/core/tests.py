@@ -1,3 +1,186 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.cache import response_cache
+from debts.models import Debt
+from emis.models import EMI
+from finance.models import Category, DailyExpense, ExpenseItem, Item
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class CoreAPITestCase(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.user = User.objects.create_user('alice', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class ResponseCacheTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(user=self.user, name='Food')
+        self.item = Item.objects.create(user=self.user, category=category, name='Lunch')
+        self.day = DailyExpense.objects.create(user=self.user, date=date(2026, 3, 10))
+        ExpenseItem.objects.create(daily_expense=self.day, item=self.item, amount=Decimal('10.00'))
+
+    def total(self, response):
+        return sum(row['value'] for row in response.data['daily_trend'])
+
+    def test_write_invalidates_cached_report(self):
+        first = self.client.get('/api/daily-expenses/reports/')
+        self.assertEqual((first['X-Cache'], self.total(first)), ('MISS', 10.0))
+        self.assertEqual(self.client.get('/api/daily-expenses/reports/')['X-Cache'], 'HIT')
+
+        ExpenseItem.objects.create(daily_expense=self.day, item=self.item, amount=Decimal('5.00'))
+        fresh = self.client.get('/api/daily-expenses/reports/')
+        self.assertEqual((fresh['X-Cache'], self.total(fresh)), ('MISS', 15.0))
+
+    def test_other_users_writes_keep_the_entry(self):
+        self.client.get('/api/daily-expenses/reports/')
+        bob = User.objects.create_user('bob', password='x')
+        bob_day = DailyExpense.objects.create(user=bob, date=date(2026, 3, 10))
+        bob_item = Item.objects.create(user=bob, category=Category.objects.create(user=bob, name='Food'), name='Tea')
+        ExpenseItem.objects.create(daily_expense=bob_day, item=bob_item, amount=Decimal('1.00'))
+        self.assertEqual(self.client.get('/api/daily-expenses/reports/')['X-Cache'], 'HIT')
+
+    def test_accept_header_format_is_part_of_the_key(self):
+        url = '/api/daily-expenses/tabular_report/?start_date=2026-03-01&end_date=2026-03-31&group_by=daily'
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='application/json')['X-Cache'], 'MISS')
+
+        response = self.client.get(url, HTTP_ACCEPT='text/csv')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertFalse(response.has_header('X-Cache'))
+        self.assertIn('Lunch', b''.join(response.streaming_content).decode())
+
+
+class ConditionalGetTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.debt = Debt.objects.create(user=self.user, person_name='Bob', amount=Decimal('20.00'), type=Debt.GIVEN)
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.client.get('/api/debts/')
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        cached = self.client.get('/api/debts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+        self.assertEqual(self.client.get('/api/debts/', HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+        self.assertEqual(
+            self.client.get('/api/debts/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304
+        )
+
+    def test_write_changes_the_etag(self):
+        etag = self.client.get('/api/debts/')['ETag']
+        self.debt.person_name = 'Robert'
+        self.debt.save()
+
+        response = self.client.get('/api/debts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['person_name'], 'Robert')
+
+    def test_etag_depends_on_query_and_user(self):
+        etag = self.client.get('/api/debts/')['ETag']
+        self.assertEqual(self.client.get('/api/debts/?status=PENDING', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        bob = APIClient()
+        bob.force_authenticate(User.objects.create_user('bob', password='x'))
+        self.assertEqual(bob.get('/api/debts/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class DashboardTests(CoreAPITestCase):
+    def test_sections_read_the_request_data(self):
+        Debt.objects.create(user=self.user, person_name='Bob', amount=Decimal('20.00'), type=Debt.GIVEN)
+        Debt.objects.create(user=self.user, person_name='Carol', amount=Decimal('5.00'), type=Debt.BORROWED)
+        EMI.objects.create(
+            user=self.user, title='Phone', start_date=date(2020, 1, 1), end_date=date(2020, 3, 1),
+            total_installments=3, installment_amount=Decimal('10.00'),
+        )
+
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['debts']['net_position'], 15.0)
+        self.assertEqual(response.data['emis']['overdue_count'], 3)
+        self.assertEqual(response.data['emis']['overdue_total'], 30.0)
+        self.assertEqual(response.data['finance']['month_to_date'], 0.0)
+
+
+class KeysetPaginationTests(CoreAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.debts = [
+            Debt.objects.create(
+                user=self.user, person_name=f'Person {n}', amount=Decimal(amount), type=Debt.GIVEN
+            )
+            for n, amount in enumerate(['50.00', '40.00', '40.00', '10.00', '5.00'])
+        ]
+        Debt.objects.filter(pk=self.debts[4].pk).update(status=Debt.CLOSED)
+        # Pending by highest outstanding (ties: newest first), then closed
+        self.expected = [self.debts[0].id, self.debts[2].id, self.debts[1].id, self.debts[3].id, self.debts[4].id]
+
+    def walk(self, url, link):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+            pages += 1
+            self.assertLess(pages, 10)
+        return ids
+
+    def test_next_then_previous(self):
+        forward = self.walk('/api/debts/?page_size=2', 'next')
+        self.assertEqual(forward, [self.expected[:2], self.expected[2:4], self.expected[4:]])
+
+        last_page = self.client.get('/api/debts/?page_size=2').data['next']
+        last_page = self.client.get(last_page).data['next']
+        backward = self.walk(self.client.get(last_page).data['previous'], 'previous')
+        self.assertEqual(backward, [self.expected[2:4], self.expected[:2]])
+
+    def test_invalid_cursors_are_not_found(self):
+        EMI.objects.create(
+            user=self.user, title='Phone', start_date=date(2026, 1, 1), end_date=date(2026, 12, 1),
+            total_installments=12, installment_amount=Decimal('10.00'), lazy_schedule=True,
+        )
+        emi = EMI.objects.get()
+        for url, value in [
+            ('/api/debts/', 'not-base64!'),
+            ('/api/debts/', cursor({'k': [1, 2]})),
+            ('/api/debts/', cursor({'k': ['PENDING', 'xx', '2026-01-01T00:00:00+00:00', 1]})),
+            ('/api/debts/', cursor({'k': ['PENDING', '1.00', 'yesterday', 1]})),
+            ('/api/debts/', cursor({'k': ['PENDING', '1.00', '2026-01-01T00:00:00+00:00', None]})),
+            ('/api/daily-expenses/', cursor({'k': ['xx', 1]})),
+            ('/api/daily-expenses/', cursor({'k': ['2026-01-01', [1]]})),
+            ('/api/installments/', cursor({'k': ['2026-01-01', 'one']})),
+            (f'/api/emis/{emi.id}/installments/', cursor({'k': ['xx']})),
+        ]:
+            with self.subTest(url=url, cursor=value):
+                response = self.client.get(url, {'cursor': value})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(str(response.data['detail']), 'Invalid cursor')
 
-# Create your tests here.
+    def test_lazy_installments_page_by_number(self):
+        emi = EMI.objects.create(
+            user=self.user, title='Phone', start_date=date(2026, 1, 1), end_date=date(2026, 12, 1),
+            total_installments=12, installment_amount=Decimal('10.00'), lazy_schedule=True,
+        )
+        url = f'/api/emis/{emi.id}/installments/?page_size=5'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append([row['installment_number'] for row in response.data['results']])
+            url = response.data['next']
+        self.assertEqual(pages, [[1, 2, 3, 4, 5], [6, 7, 8, 9, 10], [11, 12]])
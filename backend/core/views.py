@@ -1,9 +1,103 @@
+import time
+
 from rest_framework import generics
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth.models import User
+from debts.models import Counterparty
+from finance.models import Category, Item
+from .cache import cache_stats, get_data_state
+from .conditional import ConditionalGetMixin
+from .dashboard import build_dashboard
+from .search import prefix_filter, trigram_index
 from .serializers import UserSerializer
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of the response cache, per view (staff only)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+
+class DashboardView(ConditionalGetMixin, APIView):
+    """Dashboard KPIs of all three modules in one response"""
+    permission_classes = [IsAuthenticated]
+    data_modules = ('finance', 'debts', 'emis')
+
+    def get(self, request):
+        started = time.perf_counter()
+        data, timings = build_dashboard(request.user.pk)
+        response = Response(data)
+        if settings.DEBUG:
+            timings['total'] = (time.perf_counter() - started) * 1000
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={elapsed:.1f}' for name, elapsed in timings.items()
+            )
+        return response
+
+
+class SearchView(ConditionalGetMixin, APIView):
+    """
+    Typeahead over debt counterparties, items and categories.
+    ?q=ali[&types=persons,items,categories][&limit=10][&fuzzy=true]
+    Prefix matches come first; `fuzzy` tops up with trigram-similar names.
+    """
+    permission_classes = [IsAuthenticated]
+    data_modules = ('finance', 'debts')
+    max_limit = 50
+    # type -> (model, data module)
+    sources = {
+        'persons': (Counterparty, 'debts'),
+        'items': (Item, 'finance'),
+        'categories': (Category, 'finance'),
+    }
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=400)
+        types = [name for name in request.query_params.get('types', ','.join(self.sources)).split(',') if name]
+        unknown = set(types) - self.sources.keys()
+        if unknown:
+            return Response({'error': f"Unknown type(s): {', '.join(sorted(unknown))}"}, status=400)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), self.max_limit))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=400)
+        fuzzy = request.query_params.get('fuzzy', '').lower() in ('1', 'true', 'yes')
+
+        return Response({name: self.search(request, name, query, limit, fuzzy) for name in types})
+
+    def search(self, request, name, query, limit, fuzzy):
+        model, module = self.sources[name]
+        queryset = model.objects.filter(user=request.user)
+        fields = ('id', 'name', 'category_id') if model is Item else ('id', 'name')
+
+        results = list(prefix_filter(queryset, 'search_key', query).order_by('search_key').values(*fields)[:limit])
+        if fuzzy and len(results) < limit:
+            versions, _ = get_data_state(request, (module,))
+            index = trigram_index(
+                (name, request.user.pk, versions[module]),
+                lambda: queryset.values_list('id', 'name').iterator(chunk_size=5000),
+            )
+            seen = {row['id'] for row in results}
+            matches = [match for match in index.search(query, limit + len(seen)) if match[0] not in seen]
+            matches = matches[:limit - len(results)]
+            extra = {}
+            if model is Item and matches:
+                extra = dict(queryset.filter(id__in=[match[0] for match in matches]).values_list('id', 'category_id'))
+            for entry_id, entry_name, score in matches:
+                row = {'id': entry_id, 'name': entry_name, 'score': score}
+                if model is Item:
+                    row['category_id'] = extra.get(entry_id)
+                results.append(row)
+        return results
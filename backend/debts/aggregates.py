@@ -0,0 +1,114 @@
+"""
+Debt aggregates computed in the database.
+
+`debt_summary` answers the summary endpoint with one grouped query: every
+figure is a conditional SUM over the filtered queryset, and outstanding
+balances come from the stored `Debt.outstanding` column. `debt_aging` buckets
+pending balances by days past due with a CASE expression in one grouped query.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, DecimalField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+
+from .models import Debt
+
+ZERO = Decimal('0.00')
+
+
+def _sum(expression, condition=None):
+    return Coalesce(
+        Sum(expression, filter=condition, output_field=DecimalField(max_digits=14, decimal_places=2)),
+        ZERO,
+    )
+
+
+def debt_summary(queryset):
+    """Totals of the summary endpoint for an already-filtered Debt queryset"""
+    borrowed = Q(type=Debt.BORROWED)
+    given = Q(type=Debt.GIVEN)
+    pending = Q(status=Debt.PENDING)
+
+    totals = queryset.order_by().aggregate(
+        borrowed_total=_sum('amount', borrowed),
+        given_total=_sum('amount', given),
+        total_settled=_sum('amount_settled'),
+        total_outstanding=_sum('outstanding', pending),
+        borrowed_pending=_sum('amount', borrowed & pending),
+        borrowed_settled=_sum('amount_settled', borrowed),
+        given_pending=_sum('amount', given & pending),
+        given_settled=_sum('amount_settled', given),
+    )
+    return {
+        'total_borrowed': float(totals['borrowed_total']),
+        'total_given': float(totals['given_total']),
+        'total_outstanding': float(totals['total_outstanding']),
+        'total_settled': float(totals['total_settled']),
+        'borrowed_breakdown': {
+            'pending': float(totals['borrowed_pending']),
+            'settled': float(totals['borrowed_settled'])
+        },
+        'given_breakdown': {
+            'pending': float(totals['given_pending']),
+            'settled': float(totals['given_settled'])
+        }
+    }
+
+
+AGING_BUCKETS = ['current', '1-30', '31-60', '61-90', '90+']
+
+
+def _aging_bucket(today):
+    """CASE mapping `aged_from` (see debt_aging) to its bucket label"""
+    return Case(
+        When(aged_from__gte=today, then=Value('current')),
+        When(aged_from__gte=today - timedelta(days=30), then=Value('1-30')),
+        When(aged_from__gte=today - timedelta(days=60), then=Value('31-60')),
+        When(aged_from__gte=today - timedelta(days=90), then=Value('61-90')),
+        default=Value('90+'),
+        output_field=CharField(),
+    )
+
+
+def _empty_buckets():
+    return {label: 0.0 for label in AGING_BUCKETS}
+
+
+def debt_aging(queryset, today):
+    """Outstanding receivables / payables by aging bucket, per counterparty"""
+    rows = (
+        queryset.filter(status=Debt.PENDING)
+        # Age runs from the due date, or from creation when there is none
+        .alias(aged_from=Coalesce('due_date', TruncDate('created_at')))
+        .values('type', 'person_name', bucket=_aging_bucket(today))
+        .annotate(total=Sum('outstanding'), count=Count('id'))
+        .order_by()
+    )
+
+    sections = {Debt.GIVEN: {}, Debt.BORROWED: {}}
+    for row in rows:
+        person = sections[row['type']].setdefault(row['person_name'], {
+            'name': row['person_name'], 'buckets': _empty_buckets(), 'total': 0.0, 'count': 0,
+        })
+        person['buckets'][row['bucket']] += float(row['total'])
+        person['total'] += float(row['total'])
+        person['count'] += row['count']
+
+    def section(people):
+        totals = _empty_buckets()
+        for person in people.values():
+            for label, amount in person['buckets'].items():
+                totals[label] += amount
+        return {
+            'totals': totals,
+            'total': sum(totals.values()),
+            'by_person': sorted(people.values(), key=lambda person: (-person['total'], person['name'])),
+        }
+
+    return {
+        'as_of': today,
+        'buckets': AGING_BUCKETS,
+        'receivables': section(sections[Debt.GIVEN]),
+        'payables': section(sections[Debt.BORROWED]),
+    }
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class DebtsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'debts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from core.cache import track_model_changes
+        from .models import Debt, Settlement
+        track_model_changes('debts', {
+            Debt: 'user_id',
+            Settlement: 'debt.user_id',
+        })
@@ -0,0 +1,141 @@
+"""
+Maintenance of the Counterparty ledger: one row per (user, person_name) with
+what was borrowed from and lent to that person, what is still open on either
+side and when anything last happened with them.
+
+debts.signals calls `refresh_counterparties` for every Debt save/delete and new
+Settlement: both the person a debt belongs to now and, after a rename, the
+person it was loaded with. A refresh re-aggregates just those people's debts;
+balances come from the stored `outstanding` column, so settlements applied by
+queryset updates are picked up as long as the caller refreshes afterwards.
+Rows are upserted in place, so a counterparty keeps its id (the tie-breaker
+of the exposure-ordered cursor pages) while its balances change.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .models import Counterparty, Debt, Settlement
+
+ZERO = Decimal('0.00')
+
+LEDGER_FIELDS = [
+    'borrowed', 'given', 'settled', 'payable', 'receivable', 'net', 'exposure',
+    'open_count', 'debt_count', 'last_activity_at',
+]
+
+
+def _aggregate(debts):
+    """{(user_id, name): ledger values} for the given Debt queryset"""
+    borrowed = Q(type=Debt.BORROWED)
+    given = Q(type=Debt.GIVEN)
+    pending = Q(status=Debt.PENDING)
+    rows = debts.values('user_id', 'person_name').annotate(
+        borrowed=Sum('amount', filter=borrowed),
+        given=Sum('amount', filter=given),
+        settled=Sum('amount_settled'),
+        payable=Sum('outstanding', filter=borrowed & pending),
+        receivable=Sum('outstanding', filter=given & pending),
+        open_count=Count('id', filter=pending),
+        debt_count=Count('id'),
+        last_created=Max('created_at'),
+        last_closed=Max('closed_at'),
+    ).order_by()
+    last_settled = dict(
+        ((row['debt__user_id'], row['debt__person_name']), row['last'])
+        for row in Settlement.objects.filter(debt__in=debts).values(
+            'debt__user_id', 'debt__person_name'
+        ).annotate(last=Max('settled_date')).order_by()
+    )
+
+    ledger = {}
+    for row in rows:
+        key = (row['user_id'], row['person_name'])
+        values = {field: row[field] or ZERO for field in ('borrowed', 'given', 'settled', 'payable', 'receivable')}
+        values['net'] = values['receivable'] - values['payable']
+        values['exposure'] = abs(values['net'])
+        values['open_count'] = row['open_count']
+        values['debt_count'] = row['debt_count']
+        moments = [row['last_created'], row['last_closed'], last_settled.get(key)]
+        values['last_activity_at'] = max(moment for moment in moments if moment is not None)
+        ledger[key] = values
+    return ledger
+
+
+def _to_counterparties(ledger):
+    return [
+        Counterparty(user_id=user_id, name=name, **values)
+        for (user_id, name), values in ledger.items()
+    ]
+
+
+def _person_filter(keys):
+    """Debts of exactly the given (user_id, person_name) pairs, one OR term per user"""
+    names_by_user = {}
+    for user_id, name in keys:
+        names_by_user.setdefault(user_id, set()).add(name)
+    condition = Q()
+    for user_id, names in names_by_user.items():
+        condition |= Q(user_id=user_id, person_name__in=names)
+    return condition
+
+
+def refresh_counterparties(keys):
+    """
+    Recompute the ledger rows for the given (user_id, person_name) pairs.
+    Existing rows keep their ids; a person left without debts (deleted, or
+    renamed away) loses their row.
+    """
+    keys = {key for key in keys if None not in key}
+    if not keys:
+        return
+
+    with transaction.atomic():
+        ledger = _aggregate(Debt.objects.filter(_person_filter(keys)))
+        if ledger:
+            Counterparty.objects.bulk_create(
+                _to_counterparties(ledger),
+                update_conflicts=True,
+                unique_fields=['user', 'name'],
+                update_fields=LEDGER_FIELDS,
+            )
+        for user_id, name in keys - ledger.keys():
+            Counterparty.objects.filter(user_id=user_id, name=name).delete()
+
+
+def rebuild_counterparties(user_ids, batch_size=1000):
+    """
+    Drop and rebuild every ledger row of the given users, e.g. after debts were
+    changed by queryset updates that skip the signals. Rebuilt rows get new ids.
+    """
+    with transaction.atomic():
+        Counterparty.objects.filter(user_id__in=user_ids).delete()
+        ledger = _aggregate(Debt.objects.filter(user_id__in=user_ids))
+        return len(Counterparty.objects.bulk_create(_to_counterparties(ledger), batch_size=batch_size))
+
+
+def check_counterparties(user_ids):
+    """
+    Compare the stored ledger rows of the given users with a fresh aggregate of
+    their debts. Returns a list of mismatches as dicts (empty when consistent).
+    """
+    expected = _aggregate(Debt.objects.filter(user_id__in=user_ids))
+    mismatches = []
+    for row in Counterparty.objects.filter(user_id__in=user_ids).values('user_id', 'name', *LEDGER_FIELDS):
+        key = (row['user_id'], row['name'])
+        values = expected.pop(key, None)
+        if values is None:
+            mismatches.append({'key': key, 'problem': 'orphan counterparty', 'stored': row['net']})
+            continue
+        for field in LEDGER_FIELDS:
+            if values[field] != row[field]:
+                mismatches.append({
+                    'key': key,
+                    'problem': f'{field} differs',
+                    'stored': row[field],
+                    'expected': values[field],
+                })
+    for key, values in expected.items():
+        mismatches.append({'key': key, 'problem': 'missing counterparty', 'expected': values['net']})
+    return mismatches
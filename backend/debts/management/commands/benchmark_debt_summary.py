@@ -0,0 +1,110 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from debts.aggregates import debt_summary
+from debts.models import Debt
+
+
+def legacy_debt_summary(queryset):
+    """The original one-aggregate-per-figure implementation, kept as the reference"""
+    borrowed_total = queryset.filter(type=Debt.BORROWED).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    given_total = queryset.filter(type=Debt.GIVEN).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    total_settled = queryset.aggregate(total=Sum('amount_settled'))['total'] or Decimal('0.00')
+    pending_debts = queryset.filter(status=Debt.PENDING)
+    total_outstanding = sum(debt.outstanding_amount for debt in pending_debts)
+    borrowed_pending = queryset.filter(
+        type=Debt.BORROWED, status=Debt.PENDING
+    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    borrowed_settled_amount = queryset.filter(
+        type=Debt.BORROWED
+    ).aggregate(total=Sum('amount_settled'))['total'] or Decimal('0.00')
+    given_pending = queryset.filter(
+        type=Debt.GIVEN, status=Debt.PENDING
+    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    given_settled_amount = queryset.filter(
+        type=Debt.GIVEN
+    ).aggregate(total=Sum('amount_settled'))['total'] or Decimal('0.00')
+    return {
+        'total_borrowed': float(borrowed_total),
+        'total_given': float(given_total),
+        'total_outstanding': float(total_outstanding),
+        'total_settled': float(total_settled),
+        'borrowed_breakdown': {'pending': float(borrowed_pending), 'settled': float(borrowed_settled_amount)},
+        'given_breakdown': {'pending': float(given_pending), 'settled': float(given_settled_amount)},
+    }
+
+
+class Command(BaseCommand):
+    help = ('Compare query count and latency of the legacy and single-query debt summary '
+            'as debt volume grows (synthetic data, rolled back afterwards)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000,50000',
+                            help='Comma-separated debt counts to measure')
+        parser.add_argument('--persons', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            user = User.objects.create(username=f"bench-{time.time_ns()}")
+            seeded = 0
+            for size in sizes:
+                self._seed(user, rng, size - seeded, options['persons'])
+                seeded = size
+                everything = Debt.objects.filter(user=user)
+                one_person = everything.filter(person_name__icontains='person 007')
+
+                for label, queryset in (('all', everything), ('person', one_person)):
+                    legacy_time, legacy_queries, legacy = self._measure(legacy_debt_summary, queryset, options['repeat'])
+                    new_time, new_queries, result = self._measure(debt_summary, queryset, options['repeat'])
+                    if legacy != result:
+                        raise CommandError(f'{size} debts ({label}): single-query summary differs from legacy')
+                    self.stdout.write(
+                        f"{size:7} debts {label:6}  legacy {legacy_queries} queries {legacy_time * 1000:8.1f} ms   "
+                        f"single {new_queries} query {new_time * 1000:8.1f} ms   x{legacy_time / new_time:.1f}"
+                    )
+
+            transaction.set_rollback(True)
+
+    def _seed(self, user, rng, count, persons):
+        now = timezone.now()
+        debts = []
+        for _ in range(count):
+            amount = Decimal(rng.randint(100, 1000000)) / 100
+            closed = rng.random() < 0.4
+            settled = amount if closed else (amount * Decimal(rng.randint(0, 90)) / 100).quantize(Decimal('0.01'))
+            debts.append(Debt(
+                user=user,
+                person_name=f"Person {rng.randrange(persons):03d}",
+                amount=amount,
+                amount_settled=settled,
+                type=rng.choice((Debt.BORROWED, Debt.GIVEN)),
+                status=Debt.CLOSED if closed else Debt.PENDING,
+                closed_at=now if closed else None,
+            ))
+        Debt.objects.bulk_create(debts, batch_size=2000)
+
+    def _measure(self, func, queryset, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                began = time.perf_counter()
+                result = func(queryset)
+                elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries), result
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from debts.ledger import rebuild_counterparties, check_counterparties
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Counterparty ledger from Debt and Settlement rows, or verify it with --check'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to process (default: all users)')
+        parser.add_argument('--check', action='store_true', help='Only compare the ledger with the debts')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        failed = 0
+        for user in users.iterator():
+            if options['check']:
+                mismatches = check_counterparties([user.id])
+                if mismatches:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'{user.username}: {len(mismatches)} mismatched counterparties'))
+                    for mismatch in mismatches[:20]:
+                        self.stdout.write(f'  {mismatch}')
+                else:
+                    self.stdout.write(f'{user.username}: OK')
+            else:
+                created = rebuild_counterparties([user.id], batch_size=options['batch_size'])
+                self.stdout.write(f'{user.username}: {created} counterparties rebuilt')
+
+        if failed:
+            raise CommandError(f'{failed} user(s) have an inconsistent ledger; run without --check to rebuild')
+        self.stdout.write(self.style.SUCCESS('Done'))
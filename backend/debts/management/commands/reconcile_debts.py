@@ -0,0 +1,139 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import DecimalField, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+from core.cache import bump_data_version
+from debts.ledger import refresh_counterparties
+from debts.models import Debt
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare every Debt.amount_settled with the sum of its Settlement rows and check '
+        'status/closed_at against the settled balance. Reports mismatches; --fix repairs them. '
+        'Users are processed in chunks with one grouped query each, so memory stays flat.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to process (default: all users)')
+        parser.add_argument('--fix', action='store_true', help='Repair mismatches instead of only reporting them')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Users per grouped query')
+        parser.add_argument('--show', type=int, default=20, help='Mismatches to print in detail')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.shown = 0
+        self.show = options['show']
+        totals = {'users': 0, 'debts': 0, 'mismatched': 0, 'fixed': 0, 'overpaid': 0}
+        started = time.perf_counter()
+        last_id = 0
+        while True:
+            # Keyset over user ids keeps every chunk query the same cost
+            chunk = list(users.filter(id__gt=last_id).values_list('id', flat=True)[:options['chunk_size']])
+            if not chunk:
+                break
+            last_id = chunk[-1]
+            self.reconcile(chunk, options['fix'], totals)
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  {totals['users']:,} users, {totals['debts']:,} debts "
+                f"({totals['debts'] / elapsed if elapsed else 0:,.0f} debts/s), {totals['mismatched']} mismatched"
+            )
+
+        elapsed = time.perf_counter() - started
+        summary = (
+            f"Checked {totals['debts']:,} debts of {totals['users']:,} users in {elapsed:.1f}s: "
+            f"{totals['mismatched']} mismatched, {totals['fixed']} fixed, "
+            f"{totals['overpaid']} overpaid (settlements exceed the amount; fix by hand)"
+        )
+        if totals['mismatched'] > totals['fixed']:
+            raise CommandError(summary + ('' if options['fix'] else '; run with --fix to repair'))
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def reconcile(self, user_ids, fix, totals):
+        debts = Debt.objects.filter(user_id__in=user_ids)
+        totals['users'] += len(user_ids)
+        totals['debts'] += debts.count()
+
+        # SQLite sums decimals as floats (0.10 + 0.20 != 0.30): round to cents before comparing
+        settled = Coalesce(
+            Round(Sum('settlements__amount'), 2), Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+        candidates = debts.annotate(
+            settled_sum=settled,
+            last_settled=Max('settlements__settled_date'),
+        ).filter(
+            ~Q(amount_settled=F('settled_sum'))
+            | Q(status=Debt.PENDING, settled_sum__gte=F('amount'))
+            | Q(status=Debt.CLOSED, closed_at__isnull=True)
+            | Q(status=Debt.PENDING, closed_at__isnull=False)
+        ).order_by('id')
+
+        repaired = []
+        for debt in candidates.iterator(chunk_size=1000):
+            totals['mismatched'] += 1
+            expected = self.expected_state(debt)
+            self.report(debt, expected)
+            if expected is None:
+                totals['overpaid'] += 1
+                continue
+            debt.amount_settled, debt.status, debt.closed_at = expected
+            debt.version += 1
+            repaired.append(debt)
+
+        if fix and repaired:
+            with transaction.atomic():
+                Debt.objects.bulk_update(repaired, ['amount_settled', 'status', 'closed_at', 'version'], batch_size=500)
+                # bulk_update skips post_save: refresh the ledger and cached responses here
+                refresh_counterparties({(debt.user_id, debt.person_name) for debt in repaired})
+                for user_id in {debt.user_id for debt in repaired}:
+                    bump_data_version(user_id, 'debts')
+            totals['fixed'] += len(repaired)
+
+    def expected_state(self, debt):
+        """(amount_settled, status, closed_at) derived from the settlements, or None when overpaid"""
+        settled = debt.settled_sum.quantize(Decimal('0.01'))
+        if settled > debt.amount:
+            return None
+        status = debt.status
+        closed_at = debt.closed_at
+        if settled == debt.amount:
+            status = Debt.CLOSED
+        # A debt closed by hand with a balance left stays closed; only its timestamp is repaired
+        if status == Debt.CLOSED:
+            closed_at = closed_at or debt.last_settled or debt.created_at
+        else:
+            closed_at = None
+        return settled, status, closed_at
+
+    def report(self, debt, expected):
+        if self.shown >= self.show:
+            return
+        self.shown += 1
+        if expected is None:
+            self.stdout.write(self.style.ERROR(
+                f'  debt {debt.pk} ({debt.person_name}): settlements {debt.settled_sum} exceed amount {debt.amount}'
+            ))
+            return
+        changes = [
+            f'{field} {current} -> {value}'
+            for field, current, value in zip(
+                ('amount_settled', 'status', 'closed_at'),
+                (debt.amount_settled, debt.status, debt.closed_at),
+                expected,
+            )
+            if current != value
+        ]
+        self.stdout.write(self.style.WARNING(f"  debt {debt.pk} ({debt.person_name}): {', '.join(changes)}"))
@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.db.models.functions import Round
+
+from debts.models import Debt, Settlement
+from debts.settlement import STRATEGIES, SettlementConflict, SettlementError
+
+# Cent amounts: sums like 0.10 + 0.20 are not exact in binary floating point
+AMOUNTS = [Decimal('0.10'), Decimal('0.20'), Decimal('0.05'), Decimal('1.00')]
+
+
+class Command(BaseCommand):
+    help = ('Hammer the settlement strategies from concurrent threads and report settlements/s '
+            'and error rates. Writes committed rows to the configured database (a throwaway '
+            'user that is deleted afterwards), so run it against a scratch copy.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strategy', choices=[*STRATEGIES, 'both'], default='both')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--settlements', type=int, default=50, help='Settlements per thread')
+        parser.add_argument('--debts', type=int, default=4, help='Fewer debts means more contention')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        strategies = list(STRATEGIES) if options['strategy'] == 'both' else [options['strategy']]
+        for name in strategies:
+            self.run(name, options)
+
+    def run(self, name, options):
+        settle = STRATEGIES[name]
+        user = User.objects.create(username=f"stress-{time.time_ns()}")
+        try:
+            total = options['threads'] * options['settlements']
+            # Large enough that no debt closes during the run
+            debt_ids = [
+                Debt.objects.create(
+                    user=user, person_name=f"Stress {n}", amount=Decimal(total) * max(AMOUNTS), type=Debt.GIVEN
+                ).pk
+                for n in range(options['debts'])
+            ]
+            outcomes = Counter()
+            lock = threading.Lock()
+
+            def worker(seed):
+                rng = random.Random(seed)
+                local = Counter()
+                try:
+                    for _ in range(options['settlements']):
+                        try:
+                            settle(rng.choice(debt_ids), rng.choice(AMOUNTS))
+                            local['ok'] += 1
+                        except SettlementConflict:
+                            local['conflict'] += 1
+                        except SettlementError:
+                            local['rejected'] += 1
+                        except OperationalError as exc:
+                            local['locked' if 'locked' in str(exc) else 'db error'] += 1
+                finally:
+                    connection.close()
+                with lock:
+                    outcomes.update(local)
+
+            began = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                list(pool.map(worker, [options['seed'] + n for n in range(options['threads'])]))
+            elapsed = time.perf_counter() - began
+
+            # Every committed settlement must be reflected exactly once in amount_settled
+            recorded = dict(
+                Settlement.objects.filter(debt_id__in=debt_ids).values('debt_id')
+                .annotate(total=Sum('amount')).values_list('debt_id', 'total')
+            )
+            for debt in Debt.objects.filter(pk__in=debt_ids):
+                if debt.amount_settled != recorded.get(debt.pk, Decimal('0.00')):
+                    raise CommandError(f'{name}: debt {debt.pk} settled {debt.amount_settled} '
+                                       f'but settlements sum to {recorded.get(debt.pk)}')
+
+            # Compared in SQL: Python reads quantize away float drift in the stored balance
+            drifted = Debt.objects.filter(pk__in=debt_ids).exclude(amount_settled=Round('amount_settled', 2))
+            if drifted.exists():
+                raise CommandError(f'{name}: amount_settled is not a whole number of cents for debts '
+                                   f'{sorted(drifted.values_list("pk", flat=True))}')
+
+            errors = total - outcomes['ok']
+            self.stdout.write(
+                f"{name:10} {outcomes['ok'] / elapsed:8.1f} settlements/s   "
+                f"ok {outcomes['ok']}/{total}   error rate {errors / total:6.1%}   "
+                f"({', '.join(f'{key} {value}' for key, value in sorted(outcomes.items()) if key != 'ok') or 'no errors'})"
+            )
+        finally:
+            user.delete()
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:47
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('debts', '0002_settlement_debt_amount_settled_alter_debt_amount_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='debt',
+            index=models.Index(models.F('user'), models.F('status'), django.db.models.functions.comparison.Coalesce(models.F('closed_at'), models.F('created_at')), models.F('id'), name='debt_keyset_idx'),
+        ),
+    ]
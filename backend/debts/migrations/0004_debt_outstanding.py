@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:50
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('debts', '0003_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='debt',
+            name='debt_keyset_idx',
+        ),
+        migrations.AddField(
+            model_name='debt',
+            name='outstanding',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(models.F('amount'), '-', models.F('amount_settled')), 2), output_field=models.DecimalField(decimal_places=2, max_digits=10)),
+        ),
+        migrations.AddIndex(
+            model_name='debt',
+            index=models.Index(models.F('user'), models.F('status'), models.F('outstanding'), django.db.models.functions.comparison.Coalesce(models.F('closed_at'), models.F('created_at')), models.F('id'), name='debt_outstanding_idx'),
+        ),
+    ]
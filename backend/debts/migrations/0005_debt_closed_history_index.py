@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('debts', '0004_debt_outstanding'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='debt',
+            index=models.Index(fields=['user', 'status', 'closed_at'], name='debt_closed_history_idx'),
+        ),
+    ]
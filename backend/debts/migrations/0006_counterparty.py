@@ -0,0 +1,84 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:52
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def populate_counterparties(apps, schema_editor):
+    Debt = apps.get_model('debts', 'Debt')
+    Settlement = apps.get_model('debts', 'Settlement')
+    Counterparty = apps.get_model('debts', 'Counterparty')
+    pending = Q(status='PENDING')
+    rows = Debt.objects.values('user_id', 'person_name').annotate(
+        borrowed=Sum('amount', filter=Q(type='BORROWED')),
+        given=Sum('amount', filter=Q(type='GIVEN')),
+        settled=Sum('amount_settled'),
+        payable=Sum('outstanding', filter=Q(type='BORROWED') & pending),
+        receivable=Sum('outstanding', filter=Q(type='GIVEN') & pending),
+        open_count=Count('id', filter=pending),
+        debt_count=Count('id'),
+        last_created=Max('created_at'),
+        last_closed=Max('closed_at'),
+    ).order_by()
+    last_settled = {
+        (row['debt__user_id'], row['debt__person_name']): row['last']
+        for row in Settlement.objects.values('debt__user_id', 'debt__person_name')
+        .annotate(last=Max('settled_date')).order_by()
+    }
+    counterparties = []
+    for row in rows:
+        key = (row['user_id'], row['person_name'])
+        amounts = {
+            field: row[field] or Decimal('0.00')
+            for field in ('borrowed', 'given', 'settled', 'payable', 'receivable')
+        }
+        net = amounts['receivable'] - amounts['payable']
+        moments = [row['last_created'], row['last_closed'], last_settled.get(key)]
+        counterparties.append(Counterparty(
+            user_id=row['user_id'],
+            name=row['person_name'],
+            net=net,
+            exposure=abs(net),
+            open_count=row['open_count'],
+            debt_count=row['debt_count'],
+            last_activity_at=max(moment for moment in moments if moment is not None),
+            **amounts,
+        ))
+    Counterparty.objects.bulk_create(counterparties, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('debts', '0005_debt_closed_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counterparty',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('borrowed', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('given', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('settled', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('payable', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('receivable', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('net', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('exposure', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('open_count', models.PositiveIntegerField(default=0)),
+                ('debt_count', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-exposure', 'id'], name='counterparty_exposure_idx')],
+                'unique_together': {('user', 'name')},
+            },
+        ),
+        migrations.RunPython(populate_counterparties, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:54
+
+import core.search
+from core.search import normalize_name
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_search_keys(apps, schema_editor):
+    Debt = apps.get_model('debts', 'Debt')
+    Counterparty = apps.get_model('debts', 'Counterparty')
+    for model, source, target in ((Debt, 'person_name', 'person_key'), (Counterparty, 'name', 'search_key')):
+        rows = list(model.objects.only('id', source))
+        for row in rows:
+            setattr(row, target, normalize_name(getattr(row, source)))
+        model.objects.bulk_update(rows, [target], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('debts', '0006_counterparty'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='counterparty',
+            name='search_key',
+            field=core.search.SearchKeyField(default='', editable=False, max_length=100, source='name'),
+        ),
+        migrations.AddField(
+            model_name='debt',
+            name='person_key',
+            field=core.search.SearchKeyField(default='', editable=False, max_length=100, source='person_name'),
+        ),
+        migrations.AddIndex(
+            model_name='counterparty',
+            index=models.Index(fields=['user', 'search_key'], name='counterparty_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='debt',
+            index=models.Index(fields=['user', 'person_key'], name='debt_person_search_idx'),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+    ]
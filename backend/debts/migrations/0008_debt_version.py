@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('debts', '0007_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='debt',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
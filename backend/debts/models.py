@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Round
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from decimal import Decimal
+from core.search import SearchKeyField
 
 
 class Debt(models.Model):
@@ -23,6 +26,7 @@ class Debt(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     person_name = models.CharField(max_length=100, db_index=True)
+    person_key = SearchKeyField(source='person_name')
     amount = models.DecimalField(
         max_digits=10, 
         decimal_places=2,
@@ -41,14 +45,33 @@ class Debt(models.Model):
         default=Decimal('0.00'),
         validators=[MinValueValidator(Decimal('0.00'))]
     )
+    # Stored by the database, so it is always consistent with amount / amount_settled
+    # (including bulk and queryset updates) and can be indexed and ordered on.
+    # Rounded so backends without a native decimal type store the exact cent value
+    outstanding = models.GeneratedField(
+        expression=Round(F('amount') - F('amount_settled'), 2),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
     due_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # Incremented by every write; the optimistic settlement path compares-and-sets it
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'status']),
+            # Keyset pagination order of the debt lists: status, highest outstanding,
+            # last activity, id (closed debts all have zero outstanding)
+            models.Index(
+                F('user'), F('status'), F('outstanding'), Coalesce(F('closed_at'), F('created_at')), F('id'),
+                name='debt_outstanding_idx',
+            ),
+            # Closed-debt history: month headers and per-month pages
+            models.Index(fields=['user', 'status', 'closed_at'], name='debt_closed_history_idx'),
+            models.Index(fields=['user', 'person_key'], name='debt_person_search_idx'),
         ]
 
     def clean(self):
@@ -71,7 +94,19 @@ class Debt(models.Model):
             if old_instance.type != self.type:
                 raise ValidationError({'type': 'Transaction type cannot be changed after creation'})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the counterparty as loaded so a rename also refreshes the old ledger row
+        instance._loaded_counterparty = (instance.__dict__.get('user_id'), instance.__dict__.get('person_name'))
+        return instance
+
     def save(self, *args, **kwargs):
+        # The counterparty refresh (post_save signal) must commit together with the row
+        with transaction.atomic():
+            self._save(*args, **kwargs)
+
+    def _save(self, *args, **kwargs):
         # Allow closed update flag for settlement operations
         if not hasattr(self, '_allow_closed_update'):
             self._allow_closed_update = False
@@ -86,7 +121,12 @@ class Debt(models.Model):
             self.closed_at = timezone.now()
         elif self.status == self.PENDING:
             self.closed_at = None
-            
+
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+
         super().save(*args, **kwargs)
 
     @property
@@ -125,3 +165,34 @@ class Settlement(models.Model):
 
     def __str__(self):
         return f"Settlement of ${self.amount} for {self.debt.person_name}"
+
+
+class Counterparty(models.Model):
+    """
+    Running totals per user and person, derived from Debt and Settlement.
+    Maintained by debts.signals / debts.ledger - never edit directly.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=100)
+    search_key = SearchKeyField(source='name')
+    borrowed = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    given = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    settled = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    # Outstanding on pending debts: what I owe them / what they owe me
+    payable = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    receivable = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    net = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    exposure = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    open_count = models.PositiveIntegerField(default=0)
+    debt_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('user', 'name')
+        indexes = [
+            models.Index(fields=['user', '-exposure', 'id'], name='counterparty_exposure_idx'),
+            models.Index(fields=['user', 'search_key'], name='counterparty_search_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.net}"
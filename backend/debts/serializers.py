@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Debt, Settlement
+from .models import Debt, Settlement, Counterparty
 from decimal import Decimal
 
 
@@ -75,3 +75,21 @@ class DebtListSerializer(serializers.ModelSerializer):
             'created_at', 'closed_at', 'days_pending'
         ]
         read_only_fields = ['user', 'created_at', 'closed_at', 'amount_settled']
+
+
+class BulkSettlementRowSerializer(serializers.Serializer):
+    """One {debt, amount, notes} row of a bulk settlement"""
+    debt = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class CounterpartySerializer(serializers.ModelSerializer):
+    """Per-person running totals (read-only, maintained from debts)"""
+    class Meta:
+        model = Counterparty
+        fields = [
+            'id', 'name', 'borrowed', 'given', 'settled', 'payable', 'receivable',
+            'net', 'exposure', 'open_count', 'debt_count', 'last_activity_at'
+        ]
+        read_only_fields = fields
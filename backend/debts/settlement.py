@@ -0,0 +1,104 @@
+"""
+Single-debt settlement strategies.
+
+`locking` (default) settles inside a transaction that locks the debt row.
+On SQLite a write transaction locks the whole database, so bursts of
+concurrent settlements surface as "database is locked" errors.
+
+`optimistic` reads the debt without a transaction, validates the amount
+against what it read and writes the new balance with one conditional UPDATE
+(`version` unchanged since the read). If another writer got there first, it
+re-reads and retries with jittered backoff, up to a bounded number of attempts.
+
+Choose the strategy with the DEBT_SETTLEMENT_STRATEGY setting.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from rest_framework import status
+
+from .models import Debt, Settlement
+
+MAX_ATTEMPTS = 8
+BACKOFF_SECONDS = 0.005
+
+
+class SettlementError(Exception):
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+class SettlementConflict(SettlementError):
+    status_code = status.HTTP_409_CONFLICT
+
+
+def _validate(debt, amount):
+    if debt.status == Debt.CLOSED:
+        raise SettlementError('Cannot settle a closed debt')
+    if amount > debt.outstanding_amount:
+        raise SettlementError(f'Settlement amount exceeds outstanding balance of ${debt.outstanding_amount}')
+
+
+def settle_locking(debt_id, amount, notes=''):
+    """Lock the row, insert the settlement and save the debt in one transaction"""
+    with transaction.atomic():
+        debt = Debt.objects.select_for_update().get(pk=debt_id)
+        # Re-checked under the lock: another request may have settled it meanwhile
+        _validate(debt, amount)
+        Settlement.objects.create(debt=debt, amount=amount, notes=notes)
+        debt._allow_closed_update = True
+        debt.amount_settled += amount
+        debt.save()  # Auto-closure happens in save() method
+    debt.refresh_from_db()
+    return debt
+
+
+def _is_lock_error(exc):
+    return 'locked' in str(exc) or 'busy' in str(exc)
+
+
+def settle_optimistic(debt_id, amount, notes='', max_attempts=MAX_ATTEMPTS):
+    """Compare-and-set on `version`; retries on conflicts and transient lock errors"""
+    for attempt in range(max_attempts):
+        debt = Debt.objects.get(pk=debt_id)
+        _validate(debt, amount)
+        # The version check guarantees the row is still as read, so the new balance is
+        # computed here in Decimal: SQLite would do the arithmetic on floats
+        settled = debt.amount_settled + amount
+        closes = settled == debt.amount
+        try:
+            with transaction.atomic():
+                updated = Debt.objects.filter(pk=debt_id, version=debt.version).update(
+                    amount_settled=settled,
+                    version=F('version') + 1,
+                    status=Debt.CLOSED if closes else Debt.PENDING,
+                    closed_at=Now() if closes else None,
+                )
+                if updated:
+                    # Its post_save refreshes the counterparty ledger and the data version
+                    Settlement.objects.create(debt_id=debt_id, amount=amount, notes=notes)
+        except OperationalError as exc:
+            if not _is_lock_error(exc):
+                raise
+            updated = 0
+        if updated:
+            debt.refresh_from_db()
+            return debt
+        time.sleep(BACKOFF_SECONDS * (2 ** attempt) * random.random())
+    raise SettlementConflict('The debt is being settled concurrently; please retry')
+
+
+STRATEGIES = {
+    'locking': settle_locking,
+    'optimistic': settle_optimistic,
+}
+
+
+def settle_debt(debt_id, amount, notes=''):
+    """Settle with the configured strategy; raises SettlementError with an HTTP status"""
+    amount = Decimal(amount)
+    return STRATEGIES[settings.DEBT_SETTLEMENT_STRATEGY](debt_id, amount, notes)
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Debt, Settlement
+from .ledger import refresh_counterparties
+
+
+@receiver(post_save, sender=Debt)
+def refresh_counterparty_on_save(sender, instance, **kwargs):
+    keys = {(instance.user_id, instance.person_name)}
+    # A renamed person also needs the old ledger row recomputed
+    loaded = getattr(instance, '_loaded_counterparty', None)
+    if loaded:
+        keys.add(loaded)
+    refresh_counterparties(keys)
+    instance._loaded_counterparty = (instance.user_id, instance.person_name)
+
+
+@receiver(post_delete, sender=Debt)
+def refresh_counterparty_on_delete(sender, instance, **kwargs):
+    refresh_counterparties({(instance.user_id, instance.person_name)})
+
+
+@receiver(post_save, sender=Settlement)
+def refresh_counterparty_on_settlement(sender, instance, created, **kwargs):
+    """Settlements move the person's last activity"""
+    if created:
+        debt = instance.debt
+        refresh_counterparties({(debt.user_id, debt.person_name)})
@@ -1,3 +1,325 @@
-from django.test import TestCase
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.cache import response_cache
+from .ledger import check_counterparties, refresh_counterparties
+from . import settlement
+from .models import Counterparty, Debt, Settlement
+
+
+class DebtsAPITestCase(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.user = User.objects.create_user('alice', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def debt(self, person='Bob', amount='100.00', type=Debt.GIVEN, **fields):
+        return Debt.objects.create(user=self.user, person_name=person, amount=Decimal(amount), type=type, **fields)
+
+    def assertLedgerConsistent(self):
+        self.assertEqual(check_counterparties([self.user.id]), [])
+
+    def settle_rows(self, debt, *amounts):
+        """Settlement rows plus the matching amount_settled, without going through the API"""
+        for amount in amounts:
+            Settlement.objects.create(debt=debt, amount=Decimal(amount))
+        Debt.objects.filter(pk=debt.pk).update(amount_settled=sum(map(Decimal, amounts)))
+
+
+class ReconcileTests(DebtsAPITestCase):
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_debts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_consistent_cents_are_not_flagged(self):
+        # 0.10 + 0.20 sums to 0.30000000000000004 as a float
+        self.settle_rows(self.debt(amount='1.00'), '0.10', '0.20')
+        self.settle_rows(self.debt(person='Carol', amount='0.30'), '0.10', '0.20')
+        Debt.objects.filter(person_name='Carol').update(status=Debt.CLOSED, closed_at=self.user.date_joined)
+
+        output = self.reconcile()
+        self.assertIn('Checked 2 debts of 1 users', output)
+        self.assertIn('0 mismatched', output)
+
+    def test_mismatch_fails_until_fixed(self):
+        debt = self.debt(amount='1.00')
+        self.settle_rows(debt, '0.10', '0.20')
+        Debt.objects.filter(pk=debt.pk).update(amount_settled=Decimal('0.40'))
+
+        with self.assertRaisesMessage(CommandError, '1 mismatched, 0 fixed'):
+            self.reconcile()
+        self.assertIn('1 mismatched, 1 fixed', self.reconcile('--fix'))
+        debt.refresh_from_db()
+        self.assertEqual(debt.amount_settled, Decimal('0.30'))
+        self.assertIn('0 mismatched', self.reconcile())
+
+
+class LedgerTests(DebtsAPITestCase):
+    def test_create_and_settle(self):
+        self.debt(amount='100.00')
+        self.debt(amount='30.00', type=Debt.BORROWED)
+        bob = Counterparty.objects.get(name='Bob')
+        self.assertEqual((bob.receivable, bob.payable, bob.net, bob.open_count), (100, 30, 70, 2))
+
+        given = Debt.objects.get(type=Debt.GIVEN)
+        response = self.client.post(f'/api/debts/{given.id}/settle/', {'amount': '100.00'})
+        self.assertEqual(response.status_code, 200)
+        bob.refresh_from_db()
+        self.assertEqual((bob.receivable, bob.net, bob.exposure, bob.open_count), (0, -30, 30, 1))
+        # Closing the debt happens right after the settlement row and is the latest activity
+        self.assertEqual(bob.last_activity_at, Debt.objects.get(pk=given.pk).closed_at)
+        self.assertLedgerConsistent()
+
+    def test_edit_and_rename(self):
+        debt = self.debt(amount='100.00')
+        self.debt(person='Carol', amount='10.00')
+        bob_id = Counterparty.objects.get(name='Bob').id
+
+        debt.amount = Decimal('80.00')
+        debt.save()
+        self.assertEqual(Counterparty.objects.get(name='Bob').net, 80)
+        self.assertEqual(Counterparty.objects.get(name='Bob').id, bob_id)
+
+        debt.person_name = 'Carol'
+        debt.save()
+        self.assertFalse(Counterparty.objects.filter(name='Bob').exists())
+        self.assertEqual(Counterparty.objects.get(name='Carol').net, 90)
+        self.assertLedgerConsistent()
+
+    def test_delete(self):
+        first = self.debt(amount='100.00')
+        self.debt(amount='20.00')
+        first.delete()
+        self.assertEqual(Counterparty.objects.get(name='Bob').debt_count, 1)
+
+        Debt.objects.get().delete()
+        self.assertFalse(Counterparty.objects.exists())
+        self.assertLedgerConsistent()
+
+    def test_refresh_only_touches_given_people(self):
+        other = User.objects.create_user('bob', password='x')
+        self.debt(amount='10.00')
+        Debt.objects.create(user=other, person_name='Carol', amount=Decimal('5.00'), type=Debt.GIVEN)
+        # Corrupt a row in the users x names cross product that is not among the keys
+        Counterparty.objects.filter(user=self.user, name='Bob').update(net=Decimal('99.00'))
+
+        refresh_counterparties({(other.id, 'Bob'), (self.user.id, 'Carol')})
+        self.assertEqual(Counterparty.objects.get(user=self.user, name='Bob').net, 99)
+
+    def test_rebuild_command(self):
+        self.debt(amount='10.00')
+        Debt.objects.update(amount_settled=Decimal('4.00'))
+
+        with self.assertRaisesMessage(CommandError, '1 user(s) have an inconsistent ledger'):
+            call_command('rebuild_counterparties', '--check', stdout=StringIO())
+        call_command('rebuild_counterparties', stdout=StringIO())
+        call_command('rebuild_counterparties', '--check', stdout=StringIO())
+        self.assertEqual(Counterparty.objects.get(name='Bob').net, 6)
+
+
+@override_settings(TIME_ZONE='Asia/Kolkata')
+class TimelineTests(DebtsAPITestCase):
+    def test_start_and_end_are_whole_local_days(self):
+        debt = self.debt(amount='100.00')
+        for moment, amount in [
+            (datetime(2026, 2, 28, 23, 59), '1.00'),
+            (datetime(2026, 3, 1, 0, 0), '2.00'),
+            (datetime(2026, 3, 31, 23, 59, 59), '4.00'),
+            (datetime(2026, 4, 1, 0, 0), '8.00'),
+        ]:
+            settlement = Settlement.objects.create(debt=debt, amount=Decimal(amount))
+            Settlement.objects.filter(pk=settlement.pk).update(settled_date=timezone.make_aware(moment))
+
+        response = self.client.get('/api/debts/timeline/?period=month&start=2026-03-01&end=2026-03-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['results'], [{'period': '2026-03-01', 'borrowed': 0.0, 'given': 6.0, 'count': 2}]
+        )
+        bad = self.client.get('/api/debts/timeline/?end=31-03-2026')
+        self.assertEqual(bad.status_code, 400)
+
+
+class BulkSettleTests(DebtsAPITestCase):
+    def test_settles_all_rows_in_one_go(self):
+        first, second = self.debt(amount='50.00'), self.debt(person='Carol', amount='20.00')
+        response = self.client.post('/api/debts/bulk_settle/', {'settlements': [
+            {'debt': first.id, 'amount': '30.00'},
+            {'debt': first.id, 'amount': '20.00'},
+            {'debt': second.id, 'amount': '5.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['settled'], response.data['total']), (2, 55.0))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.amount_settled, first.version), (Debt.CLOSED, 50, 1))
+        self.assertEqual((second.status, second.amount_settled), (Debt.PENDING, 5))
+        self.assertEqual(Settlement.objects.count(), 3)
+        self.assertLedgerConsistent()
+
+    def test_one_bad_row_rolls_back_the_batch(self):
+        first, closed = self.debt(amount='50.00'), self.debt(person='Carol', amount='20.00')
+        Debt.objects.filter(pk=closed.pk).update(status=Debt.CLOSED)
+        other_user = User.objects.create_user('bob', password='x')
+        foreign = Debt.objects.create(user=other_user, person_name='Dan', amount=Decimal('5.00'), type=Debt.GIVEN)
+
+        for bad_row, error in [
+            ({'debt': first.id, 'amount': '30.00'}, 'Settlement amount exceeds outstanding balance of $20.00'),
+            ({'debt': closed.id, 'amount': '1.00'}, 'Cannot settle a closed debt'),
+            ({'debt': foreign.id, 'amount': '1.00'}, 'Debt not found'),
+        ]:
+            with self.subTest(error=error):
+                response = self.client.post('/api/debts/bulk_settle/', {'settlements': [
+                    {'debt': first.id, 'amount': '30.00'}, bad_row,
+                ]}, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['rows'], {1: error})
+
+        first.refresh_from_db()
+        self.assertEqual((first.amount_settled, first.version), (0, 0))
+        self.assertFalse(Settlement.objects.exists())
+        self.assertEqual(Counterparty.objects.get(name='Bob').settled, 0)
+
+    def test_locks_only_the_users_debts(self):
+        debt = self.debt(amount='50.00')
+        other_user = User.objects.create_user('bob', password='x')
+        foreign = Debt.objects.create(user=other_user, person_name='Dan', amount=Decimal('5.00'), type=Debt.GIVEN)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/debts/bulk_settle/', {'settlements': [
+                {'debt': debt.id, 'amount': '1.00'}, {'debt': foreign.id, 'amount': '1.00'},
+            ]}, format='json')
+        self.assertEqual(response.data['rows'], {1: 'Debt not found'})
+        locking = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'debts_debt' in query['sql']]
+        self.assertTrue(any('"debts_debt"."user_id" =' in sql for sql in locking))
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.amount_settled, 0)
+
+    def test_failure_after_writing_rolls_back(self):
+        debt = self.debt(amount='50.00')
+        with mock.patch('debts.views.refresh_counterparties', side_effect=RuntimeError('ledger down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/debts/bulk_settle/', {'settlements': [
+                    {'debt': debt.id, 'amount': '50.00'},
+                ]}, format='json')
+        debt.refresh_from_db()
+        self.assertEqual((debt.status, debt.amount_settled), (Debt.PENDING, 0))
+        self.assertFalse(Settlement.objects.exists())
+
+    def test_invalid_payload(self):
+        self.assertEqual(self.client.post('/api/debts/bulk_settle/', {'settlements': []}, format='json').status_code, 400)
+        response = self.client.post('/api/debts/bulk_settle/', {'settlements': [{'debt': 1, 'amount': '-1'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('amount', response.data['rows'][0])
+
+
+@override_settings(DEBT_SETTLEMENT_STRATEGY='optimistic')
+@mock.patch.object(settlement, 'BACKOFF_SECONDS', 0)
+class OptimisticSettlementTests(DebtsAPITestCase):
+    def interfere(self, debt, times, change):
+        """Apply `change` to the debt right after each of the first `times` reads, like a concurrent writer"""
+        real_get = Debt.objects.get
+        calls = []
+
+        def get(*args, **kwargs):
+            result = real_get(*args, **kwargs)
+            calls.append(result)
+            if len(calls) <= times:
+                Debt.objects.filter(pk=debt.pk).update(version=F('version') + 1, **change)
+            return result
+        return mock.patch.object(Debt.objects, 'get', side_effect=get), calls
+
+    def settle(self, debt, amount):
+        return self.client.post(f'/api/debts/{debt.id}/settle/', {'amount': amount})
+
+    def test_retries_after_a_conflict(self):
+        debt = self.debt(amount='50.00')
+        patch, calls = self.interfere(debt, 2, {})
+        with patch:
+            response = self.settle(debt, '20.00')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(len(calls), 3)
+
+        debt.refresh_from_db()
+        self.assertEqual((debt.amount_settled, debt.version), (20, 3))
+        self.assertEqual(Settlement.objects.get().amount, 20)
+        self.assertLedgerConsistent()
+
+    def test_gives_up_with_409(self):
+        debt = self.debt(amount='50.00')
+        patch, _ = self.interfere(debt, settlement.MAX_ATTEMPTS + 1, {})
+        with patch:
+            response = self.settle(debt, '20.00')
+        self.assertEqual(response.status_code, 409)
+        debt.refresh_from_db()
+        self.assertEqual(debt.amount_settled, 0)
+        self.assertFalse(Settlement.objects.exists())
+
+    def test_rechecks_the_balance_after_a_conflict(self):
+        debt = self.debt(amount='50.00')
+        # The concurrent writer settles 40 of the 50 in between
+        patch, _ = self.interfere(debt, 1, {'amount_settled': Decimal('40.00')})
+        with patch:
+            response = self.settle(debt, '20.00')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exceeds outstanding balance of $10.00', response.data['error'])
+        debt.refresh_from_db()
+        self.assertEqual(debt.amount_settled, 40)
+
+    def test_cent_amounts(self):
+        small = self.debt(amount='0.30')
+        for amount in ('0.10', '0.20'):
+            self.assertEqual(self.settle(small, amount).status_code, 200)
+        small.refresh_from_db()
+        self.assertEqual((small.amount_settled, small.outstanding, small.status), (Decimal('0.30'), 0, Debt.CLOSED))
+
+        tenths = self.debt(person='Carol', amount='1.00')
+        for _ in range(10):
+            self.assertEqual(self.settle(tenths, '0.10').status_code, 200)
+        tenths.refresh_from_db()
+        self.assertEqual((tenths.amount_settled, tenths.status), (Decimal('1.00'), Debt.CLOSED))
+        self.assertIsNotNone(tenths.closed_at)
+        self.assertEqual(self.settle(tenths, '0.01').status_code, 400)
+        self.assertLedgerConsistent()
+
+    def test_closes_on_the_last_cent(self):
+        debt = self.debt(amount='50.00')
+        response = self.settle(debt, '50.00')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['debt']['status'], Debt.CLOSED)
+        self.assertIsNotNone(Debt.objects.get().closed_at)
+        self.assertLedgerConsistent()
+
+    def test_retries_when_the_database_is_locked(self):
+        debt = self.debt(amount='50.00')
+        real_create = Settlement.objects.create
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return real_create(**kwargs)
+
+        with mock.patch.object(Settlement.objects, 'create', side_effect=create):
+            response = self.settle(debt, '20.00')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 2)
+        # The locked attempt rolled back its balance update
+        debt.refresh_from_db()
+        self.assertEqual((debt.amount_settled, debt.version), (20, 1))
+        self.assertEqual(Settlement.objects.get().amount, 20)
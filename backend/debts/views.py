@@ -1,16 +1,44 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Q, Count
+from django.db.models import Sum, Q, Count, F
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek, TruncMonth
 from django.db import transaction
+from django.utils import timezone
 from decimal import Decimal
-from .models import Debt, Settlement
-from .serializers import DebtSerializer, DebtListSerializer, SettlementSerializer
-from datetime import datetime
+from core.cache import cached_response, bump_data_version
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from core.search import prefix_filter
+from .aggregates import debt_summary, debt_aging
+from .ledger import refresh_counterparties
+from .models import Debt, Settlement, Counterparty
+from .settlement import settle_debt, SettlementError
+from .serializers import (
+    DebtSerializer, DebtListSerializer, SettlementSerializer, BulkSettlementRowSerializer,
+    CounterpartySerializer
+)
+from datetime import datetime, time, timedelta
 
+MAX_BULK_SETTLEMENTS = 1000
 
-class DebtViewSet(viewsets.ModelViewSet):
+TIMELINE_PERIODS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+class DebtViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    data_modules = ('debts',)
+    pagination_class = KeysetPagination
+
+    @property
+    def keyset_ordering(self):
+        if self.action == 'closed':
+            return ('-closed_at', '-id')
+        if self.action == 'timeline':
+            return ('-period',)
+        # Pending before closed ('PENDING' > 'CLOSED'), highest outstanding first,
+        # then most recent activity
+        return ('-status', '-outstanding', '-activity_at', '-id')
 
     def get_serializer_class(self):
         """Use optimized serializer for list views"""
@@ -25,7 +53,8 @@ class DebtViewSet(viewsets.ModelViewSet):
         # Apply person filter if provided
         person = self.request.query_params.get('person', None)
         if person:
-            queryset = queryset.filter(person_name__icontains=person)
+            # Prefix match on the normalized name, served by the (user, person_key) index
+            queryset = prefix_filter(queryset, 'person_key', person)
         
         # Apply status filter if provided
         status_filter = self.request.query_params.get('status', None)
@@ -35,18 +64,14 @@ class DebtViewSet(viewsets.ModelViewSet):
         return queryset
 
     def list(self, request, *args, **kwargs):
-        """Custom list with sorting by outstanding amount for pending"""
-        queryset = self.get_queryset()
-        
-        # Sort pending by highest outstanding, others by created_at
-        pending_debts = queryset.filter(status=Debt.PENDING).order_by('-amount_settled', '-created_at')
-        closed_debts = queryset.filter(status=Debt.CLOSED).order_by('-closed_at')
-        
-        # Combine querysets
-        combined = list(pending_debts) + list(closed_debts)
-        
-        serializer = self.get_serializer(combined, many=True)
-        return Response({'results': serializer.data})
+        """Pending debts (highest outstanding first), then closed; cursor-paginated"""
+        page = self.paginate_queryset(self.with_activity(self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def with_activity(self, queryset):
+        """Annotate the `activity_at` key used by the list ordering"""
+        return queryset.annotate(activity_at=Coalesce('closed_at', 'created_at'))
 
     def perform_create(self, serializer):
         """Auto-assign user on creation"""
@@ -54,55 +79,55 @@ class DebtViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        """Get only pending debts, sorted by highest outstanding"""
+        """Pending debts, highest outstanding first, cursor-paginated, with totals"""
         queryset = self.get_queryset().filter(status=Debt.PENDING)
-        
-        # Sort by outstanding amount (descending) - we need to calculate it
-        debts = list(queryset)
-        debts.sort(key=lambda d: d.outstanding_amount, reverse=True)
-        
-        serializer = DebtListSerializer(debts, many=True)
-        
-        # Calculate total outstanding
-        total_outstanding = sum(d.outstanding_amount for d in debts)
-        
-        return Response({
-            'count': len(debts),
-            'total_outstanding': float(total_outstanding),
-            'results': serializer.data
-        })
+        totals = queryset.aggregate(
+            count=Count('id'),
+            total_outstanding=Coalesce(Sum('outstanding'), Decimal('0.00')),
+        )
+
+        page = self.paginate_queryset(self.with_activity(queryset))
+        response = self.get_paginated_response(DebtListSerializer(page, many=True).data)
+        response.data['count'] = totals['count']
+        response.data['total_outstanding'] = float(totals['total_outstanding'])
+        return response
 
     @action(detail=False, methods=['get'])
     def closed(self, request):
-        """Get closed debts grouped by month"""
-        queryset = self.get_queryset().filter(status=Debt.CLOSED).order_by('-closed_at')
-        
-        # Group by month
-        groups = {}
-        for debt in queryset:
-            if debt.closed_at:
-                month_key = debt.closed_at.strftime('%Y-%m')
-                month_display = debt.closed_at.strftime('%B %Y')
-                
-                if month_key not in groups:
-                    groups[month_key] = {
-                        'month': month_key,
-                        'month_display': month_display,
-                        'debts': [],
-                        'count': 0
-                    }
-                
-                groups[month_key]['debts'].append(debt)
-                groups[month_key]['count'] += 1
-        
-        # Convert to list and serialize
-        result = []
-        for month_key in sorted(groups.keys(), reverse=True):
-            group = groups[month_key]
-            group['debts'] = DebtListSerializer(group['debts'], many=True).data
-            result.append(group)
-        
-        return Response({'groups': result})
+        """
+        Closed-debt history. Without `month`: month headers (count, total), newest first.
+        With `?month=YYYY-MM`: that month's debts, newest first, cursor-paginated.
+        """
+        queryset = self.get_queryset().filter(status=Debt.CLOSED, closed_at__isnull=False)
+
+        month = request.query_params.get('month')
+        if month:
+            try:
+                start = datetime.strptime(month, '%Y-%m')
+            except ValueError:
+                return Response({'error': 'month must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+            end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+            queryset = queryset.filter(
+                closed_at__gte=timezone.make_aware(start), closed_at__lt=timezone.make_aware(end)
+            )
+            page = self.paginate_queryset(queryset)
+            return self.get_paginated_response(DebtListSerializer(page, many=True).data)
+
+        months = (
+            queryset.annotate(month=TruncMonth('closed_at'))
+            .values('month')
+            .annotate(count=Count('id'), total=Sum('amount'))
+            .order_by('-month')
+        )
+        return Response({'groups': [
+            {
+                'month': row['month'].strftime('%Y-%m'),
+                'month_display': row['month'].strftime('%B %Y'),
+                'count': row['count'],
+                'total': float(row['total']),
+            }
+            for row in months
+        ]})
 
     @action(detail=True, methods=['post'])
     def settle(self, request, pk=None):
@@ -141,25 +166,11 @@ class DebtViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Perform atomic settlement
-        with transaction.atomic():
-            # Lock the debt row to prevent race conditions
-            debt = Debt.objects.select_for_update().get(pk=pk, user=request.user)
-            
-            # Create settlement record
-            Settlement.objects.create(
-                debt=debt,
-                amount=settlement_amount,
-                notes=notes
-            )
-            
-            # Update debt
-            debt._allow_closed_update = True
-            debt.amount_settled += settlement_amount
-            debt.save()  # Auto-closure happens in save() method
-        
-        # Refresh and return updated debt
-        debt.refresh_from_db()
+        try:
+            debt = settle_debt(debt.pk, settlement_amount, notes)
+        except SettlementError as exc:
+            return Response({'error': str(exc)}, status=exc.status_code)
+
         serializer = DebtSerializer(debt)
         
         response_data = {
@@ -169,66 +180,178 @@ class DebtViewSet(viewsets.ModelViewSet):
         
         return Response(response_data)
 
+    @action(detail=False, methods=['post'])
+    def bulk_settle(self, request):
+        """
+        Settle many debts in one transaction; nothing is written unless every row is valid.
+        Body: {"settlements": [{"debt": 4, "amount": "250.00", "notes": "..."}, ...]}
+        Response: {"settled": 2, "total": 400.0, "results": [{"debt": 4, "settled": 250.0,
+                   "outstanding": 0.0, "status": "CLOSED"}, ...]}
+        """
+        rows = request.data.get('settlements') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'settlements must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_BULK_SETTLEMENTS:
+            return Response(
+                {'error': f'At most {MAX_BULK_SETTLEMENTS} settlements per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = BulkSettlementRowSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            return Response({'error': 'Invalid settlements', 'rows': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        rows = serializer.validated_data
+
+        with transaction.atomic():
+            # Every target row locked by a single query, scoped to the user so other
+            # users' debts are never locked; their ids come back as not found
+            debts = Debt.objects.select_for_update().filter(user=request.user).in_bulk(
+                {row['debt'] for row in rows}, field_name='pk'
+            )
+
+            # Validate against running balances so repeated debts cannot overshoot
+            settled = {}
+            errors = {}
+            for index, row in enumerate(rows):
+                debt = debts.get(row['debt'])
+                if debt is None:
+                    errors[index] = 'Debt not found'
+                elif debt.status == Debt.CLOSED:
+                    errors[index] = 'Cannot settle a closed debt'
+                else:
+                    remaining = debt.outstanding_amount - settled.get(debt.pk, Decimal('0.00'))
+                    if row['amount'] > remaining:
+                        errors[index] = f'Settlement amount exceeds outstanding balance of ${remaining}'
+                    else:
+                        settled[debt.pk] = settled.get(debt.pk, Decimal('0.00')) + row['amount']
+            if errors:
+                return Response({'error': 'Invalid settlements', 'rows': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            Settlement.objects.bulk_create([
+                Settlement(debt_id=row['debt'], amount=row['amount'], notes=row['notes']) for row in rows
+            ])
+            now = timezone.now()
+            for pk, amount in settled.items():
+                debt = debts[pk]
+                debt.amount_settled += amount
+                debt.version += 1
+                if debt.outstanding_amount == Decimal('0.00'):
+                    debt.status = Debt.CLOSED
+                    debt.closed_at = now
+            Debt.objects.bulk_update(
+                [debts[pk] for pk in settled], ['amount_settled', 'status', 'closed_at', 'version']
+            )
+            # bulk writes skip post_save, so refresh the ledger and cached responses here
+            refresh_counterparties({(request.user.pk, debts[pk].person_name) for pk in settled})
+            bump_data_version(request.user.pk, 'debts')
+
+        return Response({
+            'settled': len(settled),
+            'total': float(sum(settled.values())),
+            'results': [
+                {
+                    'debt': pk,
+                    'settled': float(amount),
+                    'outstanding': float(debts[pk].outstanding_amount),
+                    'status': debts[pk].status,
+                }
+                for pk, amount in settled.items()
+            ]
+        })
+
     @action(detail=False, methods=['get'])
+    @cached_response('debts')
     def summary(self, request):
-        """Enhanced summary with person filter support"""
-        queryset = self.get_queryset()
-        
-        # Total borrowed and given
-        borrowed_total = queryset.filter(type=Debt.BORROWED).aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-        
-        given_total = queryset.filter(type=Debt.GIVEN).aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-        
-        # Total settled (across all debts)
-        total_settled = queryset.aggregate(
-            total=Sum('amount_settled')
-        )['total'] or Decimal('0.00')
-        
-        # Calculate total outstanding (sum of all outstanding amounts)
-        pending_debts = queryset.filter(status=Debt.PENDING)
-        total_outstanding = sum(debt.outstanding_amount for debt in pending_debts)
-        
-        # Breakdown by type and status
-        borrowed_pending = queryset.filter(
-            type=Debt.BORROWED, status=Debt.PENDING
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        borrowed_settled_amount = queryset.filter(
-            type=Debt.BORROWED
-        ).aggregate(total=Sum('amount_settled'))['total'] or Decimal('0.00')
-        
-        given_pending = queryset.filter(
-            type=Debt.GIVEN, status=Debt.PENDING
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        given_settled_amount = queryset.filter(
-            type=Debt.GIVEN
-        ).aggregate(total=Sum('amount_settled'))['total'] or Decimal('0.00')
-        
-        return Response({
-            'total_borrowed': float(borrowed_total),
-            'total_given': float(given_total),
-            'total_outstanding': float(total_outstanding),
-            'total_settled': float(total_settled),
-            'borrowed_breakdown': {
-                'pending': float(borrowed_pending),
-                'settled': float(borrowed_settled_amount)
-            },
-            'given_breakdown': {
-                'pending': float(given_pending),
-                'settled': float(given_settled_amount)
+        """Enhanced summary with person filter support (one aggregate query)"""
+        return Response(debt_summary(self.get_queryset()))
+
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """
+        Repayments over time, newest period first, cursor-paginated by period.
+        ?period=day|week|month (default month) &start=YYYY-MM-DD &end=YYYY-MM-DD &by_person=true
+        Debt filters (person, status) apply to the settled debts.
+        """
+        trunc = TIMELINE_PERIODS.get(request.query_params.get('period', 'month'))
+        if trunc is None:
+            return Response({'error': 'period must be day, week or month'}, status=status.HTTP_400_BAD_REQUEST)
+
+        settlements = Settlement.objects.filter(debt__in=self.get_queryset())
+        # Days become aware datetime bounds (local midnights) so the (debt, settled_date)
+        # index serves the range; a __date lookup would convert every row instead
+        for param, lookup, days_after in (('start', 'settled_date__gte', 0), ('end', 'settled_date__lt', 1)):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    day = datetime.strptime(value, '%Y-%m-%d').date() + timedelta(days=days_after)
+                except ValueError:
+                    return Response({'error': f'{param} must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+                settlements = settlements.filter(**{lookup: timezone.make_aware(datetime.combine(day, time.min))})
+        settlements = settlements.annotate(period=trunc('settled_date'))
+
+        periods = settlements.values('period').annotate(
+            borrowed=Coalesce(Sum('amount', filter=Q(debt__type=Debt.BORROWED)), Decimal('0.00')),
+            given=Coalesce(Sum('amount', filter=Q(debt__type=Debt.GIVEN)), Decimal('0.00')),
+            count=Count('id'),
+        )
+        page = self.paginate_queryset(periods)
+
+        persons = {}
+        if page and request.query_params.get('by_person', '').lower() in ('1', 'true', 'yes'):
+            rows = (
+                settlements.filter(period__lte=page[0]['period'], period__gte=page[-1]['period'])
+                .values('period', name=F('debt__person_name'), type=F('debt__type'))
+                .annotate(total=Sum('amount'), count=Count('id'))
+                .order_by('period', '-total', 'name')
+            )
+            for row in rows:
+                persons.setdefault(row['period'], []).append({
+                    'name': row['name'], 'type': row['type'], 'total': float(row['total']), 'count': row['count'],
+                })
+
+        results = []
+        for row in page:
+            entry = {
+                'period': row['period'].date().isoformat(),
+                'borrowed': float(row['borrowed']),
+                'given': float(row['given']),
+                'count': row['count'],
             }
-        })
+            if persons:
+                entry['persons'] = persons.get(row['period'], [])
+            results.append(entry)
+        return self.get_paginated_response(results)
+
+    @action(detail=False, methods=['get'])
+    @cached_response('debts')
+    def aging(self, request):
+        """Pending receivables / payables by days past due (current, 1-30, 31-60, 61-90, 90+)"""
+        return Response(debt_aging(self.get_queryset(), timezone.now().date()))
 
     @action(detail=False, methods=['get'])
     def persons(self, request):
         """Get unique person names for filter dropdown"""
-        persons = Debt.objects.filter(
+        persons = Counterparty.objects.filter(
             user=request.user
-        ).values_list('person_name', flat=True).distinct().order_by('person_name')
+        ).values_list('name', flat=True).order_by('name')
         
         return Response({'persons': list(persons)})
+
+
+class CounterpartyViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Net position per person, largest exposure first (`?name=` for one person).
+    Rows are maintained from debts, so reading one is a single indexed lookup.
+    """
+    serializer_class = CounterpartySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    data_modules = ('debts',)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-exposure', 'id')
+
+    def get_queryset(self):
+        queryset = Counterparty.objects.filter(user=self.request.user)
+        name = self.request.query_params.get('name')
+        if name:
+            queryset = queryset.filter(name=name)
+        return queryset
@@ -0,0 +1,143 @@
+"""
+Reducing-balance amortization for interest-bearing EMIs.
+
+Scenarios are rows and installments are columns of NumPy arrays. The balance
+after each installment has a closed form, so a whole batch of what-if
+scenarios (different tenures, recurring extra payments, lump-sum prepayments)
+is evaluated with a handful of array operations instead of a Python loop per
+scenario and month. Installments are assumed to be monthly: the per-period
+rate is the annual rate / 12.
+"""
+import numpy as np
+
+# Balances within half a cent of zero count as repaid
+PAID_OFF = 0.005
+
+
+def periodic_rate(annual_rate):
+    """Annual percentage (8.5) -> rate per monthly installment (0.00708…)"""
+    return np.asarray(annual_rate, dtype=np.float64) / 1200
+
+
+def level_payment(principal, annual_rate, months):
+    """Installment that repays `principal` over `months` at `annual_rate` (broadcasts)"""
+    principal = np.asarray(principal, dtype=np.float64)
+    months = np.asarray(months, dtype=np.float64)
+    rate = periodic_rate(annual_rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + rate) ** months
+        annuity = principal * rate * growth / (growth - 1)
+    return np.where(rate == 0, principal / months, annuity)
+
+
+def simulate(principal, annual_rate, payment, extra):
+    """
+    Amortize S scenarios of one loan over M installments.
+
+    `principal` and `payment` are scalars or (S,) arrays; `extra` is an (S, M)
+    array of principal paid on top of each installment (recurring extra payments
+    plus lump-sum prepayments).
+
+    Returns a dict of (S, M) arrays `balance` (after the installment), `interest`,
+    `principal` and `payment` (zero after payoff) plus (S,) `months` (installments
+    until the balance reaches zero, M + 1 if it never does) and `total_interest`.
+    """
+    extra = np.asarray(extra, dtype=np.float64)
+    scenarios, horizon = extra.shape
+    principal = np.broadcast_to(np.asarray(principal, dtype=np.float64), (scenarios,))[:, None]
+    payment = np.broadcast_to(np.asarray(payment, dtype=np.float64), (scenarios,))[:, None]
+    rate = float(periodic_rate(annual_rate))
+
+    # B_t = B_0 g^t - P (g^t - 1) / r - g^t * sum_{k<=t} X_k g^-k, with g = 1 + r
+    t = np.arange(1, horizon + 1, dtype=np.float64)
+    growth = (1 + rate) ** t
+    annuity = (growth - 1) / rate if rate else t
+    balance = principal * growth
+    balance -= payment * annuity
+    if extra.any():
+        prepaid = np.cumsum(extra / growth, axis=1)
+        prepaid *= growth
+        balance -= prepaid
+
+    repaid = balance <= PAID_OFF
+    months = np.where(repaid.any(axis=1), repaid.argmax(axis=1) + 1, horizon + 1)
+    # Zero from the payoff installment on
+    balance[t >= months[:, None]] = 0.0
+
+    opening = np.empty_like(balance)
+    opening[:, 0] = principal[:, 0]
+    opening[:, 1:] = balance[:, :-1]
+    interest = opening * rate
+    interest[t > months[:, None]] = 0.0
+    principal_paid = opening - balance
+    return {
+        'balance': balance,
+        'interest': interest,
+        'principal': principal_paid,
+        'payment': interest + principal_paid,
+        'months': months,
+        'total_interest': interest.sum(axis=1),
+    }
+
+
+def outstanding_principal(principal, annual_rate, payment, paid):
+    """Principal still owed after `paid` installments of `payment`"""
+    if paid <= 0:
+        return float(principal)
+    result = simulate(principal, annual_rate, payment, np.zeros((1, paid)))
+    return float(result['balance'][0, -1])
+
+
+def what_if(principal, annual_rate, months, scenarios):
+    """
+    Evaluate prepayment / tenure scenarios against the level schedule of a loan
+    with `principal` left over `months` installments.
+
+    Each scenario is a dict with optional `tenure` (installments, re-amortized at
+    the same rate), `extra_monthly` (paid with every installment) and
+    `prepayments` ([{'month': n, 'amount': a}], n = 1 for the next installment).
+    Prepayments keep the installment and shorten the tenure.
+    """
+    tenures = np.array([scenario.get('tenure') or months for scenario in scenarios], dtype=np.int64)
+    horizon = int(max(tenures.max(), months))
+    payments = level_payment(principal, annual_rate, tenures)
+
+    extra = np.zeros((len(scenarios), horizon))
+    extra += np.array([float(scenario.get('extra_monthly') or 0) for scenario in scenarios])[:, None]
+    rows, columns, amounts = [], [], []
+    for row, scenario in enumerate(scenarios):
+        for prepayment in scenario.get('prepayments') or ():
+            if prepayment['month'] <= horizon:
+                rows.append(row)
+                columns.append(prepayment['month'] - 1)
+                amounts.append(float(prepayment['amount']))
+    np.add.at(extra, (rows, columns), amounts)
+
+    result = simulate(principal, annual_rate, payments, extra)
+    baseline_payment = level_payment(principal, annual_rate, months)
+    baseline = simulate(principal, annual_rate, baseline_payment, np.zeros((1, months)))
+    baseline_interest = float(baseline['total_interest'][0])
+    columns = zip(
+        np.minimum(result['months'], horizon).tolist(),
+        np.round(payments, 2).tolist(),
+        np.round(result['total_interest'], 2).tolist(),
+        np.round(baseline_interest - result['total_interest'], 2).tolist(),
+        np.round(result['payment'].sum(axis=1), 2).tolist(),
+    )
+    return {
+        'baseline': {
+            'months': months,
+            'payment': round(float(baseline_payment), 2),
+            'total_interest': round(baseline_interest, 2),
+        },
+        'scenarios': [
+            {
+                'months': scenario_months,
+                'payment': payment,
+                'total_interest': total_interest,
+                'interest_saved': interest_saved,
+                'total_payment': total_payment,
+            }
+            for scenario_months, payment, total_interest, interest_saved, total_payment in columns
+        ],
+    }
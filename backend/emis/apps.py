@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class EmisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'emis'
+
+    def ready(self):
+        from core.cache import track_model_changes
+        from .models import EMI, Installment
+        track_model_changes('emis', {
+            EMI: 'user_id',
+            Installment: 'emi.user_id',
+        })
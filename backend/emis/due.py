@@ -0,0 +1,45 @@
+"""
+Pending installments by due date across all of a user's active EMIs.
+
+Stored schedules are one range scan on the (status, due_date) index. Lazy
+schedules keep their pending installments out of the table, so those are
+computed from each lazy EMI's dates for the same window and merged in.
+"""
+from django.db.models import F
+
+from .models import EMI, Installment
+
+FIELDS = ('id', 'emi_id', 'installment_number', 'due_date', 'amount')
+
+
+def pending_installments(user_id, start=None, end=None):
+    """
+    Rows ({id, emi_id, emi_title, installment_number, due_date, amount}) of pending
+    installments due within [start, end], either bound optional, by due date.
+    Computed installments of lazy schedules have a null id.
+    """
+    window = {}
+    if start:
+        window['due_date__gte'] = start
+    if end:
+        window['due_date__lte'] = end
+    rows = list(
+        Installment.objects.filter(
+            status=Installment.PENDING, emi__user_id=user_id, emi__status=EMI.ACTIVE, **window
+        ).order_by('due_date').values(*FIELDS, emi_title=F('emi__title'))
+    )
+
+    lazy = EMI.objects.filter(user_id=user_id, status=EMI.ACTIVE, lazy_schedule=True)
+    for emi in lazy.prefetch_related('installments'):
+        # Stored rows are either paid or pending ones the range query already returned
+        stored = {installment.installment_number for installment in emi.installments.all()}
+        for number in emi.numbers_due_between(start, end):
+            if number not in stored:
+                installment = emi.build_installment(number)
+                rows.append({
+                    'id': None, 'emi_id': emi.id, 'installment_number': number,
+                    'due_date': installment.due_date, 'amount': installment.amount, 'emi_title': emi.title,
+                })
+
+    rows.sort(key=lambda row: (row['due_date'], row['emi_id'], row['installment_number']))
+    return rows
@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from emis.amortization import PAID_OFF, level_payment, what_if
+
+
+def loop_what_if(principal, annual_rate, months, scenarios):
+    """Month-by-month reference: (installments, total interest) per scenario"""
+    rate = annual_rate / 1200
+    results = []
+    for scenario in scenarios:
+        tenure = scenario.get('tenure') or months
+        payment = float(level_payment(principal, annual_rate, tenure))
+        extra = float(scenario.get('extra_monthly') or 0)
+        prepaid = {}
+        for prepayment in scenario.get('prepayments') or ():
+            prepaid[prepayment['month']] = prepaid.get(prepayment['month'], 0.0) + float(prepayment['amount'])
+        balance, total_interest, month = principal, 0.0, 0
+        for month in range(1, max(tenure, months) + 1):
+            interest = balance * rate
+            total_interest += interest
+            balance += interest - payment - extra - prepaid.get(month, 0.0)
+            if balance <= PAID_OFF:
+                break
+        results.append((month, total_interest))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Time what-if scenarios with the vectorized amortization engine against a per-month loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', type=int, default=1000)
+        parser.add_argument('--months', type=int, default=360)
+        parser.add_argument('--principal', type=float, default=5_000_000)
+        parser.add_argument('--rate', type=float, default=8.5)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        principal, rate, months = options['principal'], options['rate'], options['months']
+        scenarios = [self._scenario(rng, index, principal, months) for index in range(options['scenarios'])]
+
+        loop_time, reference = self._time(loop_what_if, principal, rate, months, scenarios, options['repeat'])
+        vector_time, result = self._time(what_if, principal, rate, months, scenarios, options['repeat'])
+        for index, ((expected_months, expected_interest), row) in enumerate(zip(reference, result['scenarios'])):
+            if row['months'] != expected_months or abs(row['total_interest'] - expected_interest) > 0.01:
+                raise CommandError(f'scenario {index}: {row} differs from the loop ({expected_months}, {expected_interest:.2f})')
+
+        self.stdout.write(
+            f"{len(scenarios)} scenarios x {months} months   "
+            f"loop {loop_time * 1000:9.1f} ms   "
+            f"vectorized {vector_time * 1000:9.1f} ms   "
+            f"speedup x{loop_time / vector_time:.1f}   (outputs match)"
+        )
+
+    def _scenario(self, rng, index, principal, months):
+        kind = index % 3
+        if kind == 0:
+            return {'tenure': rng.randint(12, months)}
+        if kind == 1:
+            return {'extra_monthly': round(rng.uniform(0, principal / months), 2)}
+        return {'prepayments': [
+            {'month': rng.randint(1, months), 'amount': round(rng.uniform(1, principal / 3), 2)}
+            for _ in range(rng.randint(1, 4))
+        ]}
+
+    def _time(self, func, principal, rate, months, scenarios, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            began = time.perf_counter()
+            result = func(principal, rate, months, scenarios)
+            elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emis', '0002_alter_installment_options_remove_emi_monthly_amount_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['due_date', 'id'], name='installment_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emis', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emi',
+            name='lazy_schedule',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:05
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emis', '0004_emi_lazy_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emi',
+            name='interest_rate',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Annual %', max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        migrations.AddField(
+            model_name='emi',
+            name='principal',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emis', '0005_emi_principal_interest_rate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['status', 'due_date'], name='installment_status_due_idx'),
+        ),
+    ]
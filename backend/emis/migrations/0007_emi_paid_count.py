@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_paid_installments(apps, schema_editor):
+    EMI = apps.get_model('emis', 'EMI')
+    Installment = apps.get_model('emis', 'Installment')
+    paid = (
+        Installment.objects.filter(emi=OuterRef('pk'), status='PAID')
+        .order_by().values('emi').annotate(count=Count('id')).values('count')
+    )
+    EMI.objects.update(paid_count=Coalesce(Subquery(paid), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emis', '0006_installment_status_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emi',
+            name='paid_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_paid_installments, migrations.RunPython.noop),
+    ]
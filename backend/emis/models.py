@@ -1,10 +1,14 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
+from bisect import bisect_left, bisect_right
 from datetime import timedelta
 from decimal import Decimal
 
+from core.cache import bump_data_version
+
 class EMI(models.Model):
     ACTIVE = 'ACTIVE'
     COMPLETED = 'COMPLETED'
@@ -19,41 +23,110 @@ class EMI(models.Model):
     end_date = models.DateField()
     total_installments = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     installment_amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    # Interest-bearing loans (reducing balance, see emis.amortization); both empty for flat EMIs
+    principal = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, validators=[MinValueValidator(Decimal('0.01'))])
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, validators=[MinValueValidator(Decimal('0.00'))], help_text='Annual %')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ACTIVE)
+    # Paid installments, kept by `add_paid_installments`; COMPLETED once it reaches total_installments
+    paid_count = models.PositiveIntegerField(default=0, editable=False)
+    # Only paid or edited installments are stored; the rest are computed (see `schedule`)
+    lazy_schedule = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def clean(self):
         if self.start_date and self.end_date and self.start_date >= self.end_date:
             raise ValidationError("Start date must be before end date.")
+        if (self.principal is None) != (self.interest_rate is None):
+            raise ValidationError("Principal and interest rate must be given together.")
+
+    @property
+    def is_amortized(self):
+        return self.principal is not None and self.interest_rate is not None
 
     def save(self, *args, **kwargs):
         self.clean()
         is_new = self.pk is None
-        super().save(*args, **kwargs)
-        if is_new:
-            self.generate_installments()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                self.generate_installments()
 
-    def generate_installments(self):
-        """Evenly space installments between start and end date."""
+    def due_date_for(self, number):
+        """Due date of installment `number` (1-based), evenly spaced between start and end date"""
         if self.total_installments == 1:
-            Installment.objects.create(
-                emi=self,
-                installment_number=1,
-                due_date=self.start_date,
-                amount=self.installment_amount
-            )
+            return self.start_date
+        interval = (self.end_date - self.start_date).days / (self.total_installments - 1)
+        return self.start_date + timedelta(days=round((number - 1) * interval))
+
+    def numbers_due_between(self, start=None, end=None):
+        """Installment numbers due within [start, end] (either bound optional); dates only grow with the number"""
+        numbers = range(1, self.total_installments + 1)
+        first = bisect_left(numbers, start, key=self.due_date_for) if start else 0
+        last = bisect_right(numbers, end, key=self.due_date_for) if end else len(numbers)
+        return numbers[first:last]
+
+    def build_installment(self, number):
+        """Unsaved installment `number` as the schedule defines it"""
+        return Installment(
+            emi=self,
+            installment_number=number,
+            due_date=self.due_date_for(number),
+            amount=self.installment_amount
+        )
+
+    def generate_installments(self):
+        """Store the full schedule in one INSERT; lazy schedules store nothing up front."""
+        if self.lazy_schedule:
             return
+        Installment.objects.bulk_create(
+            [self.build_installment(number) for number in range(1, self.total_installments + 1)]
+        )
+        # bulk_create sends no post_save; the EMI's own save bumped before the rows existed
+        bump_data_version(self.user_id, 'emis')
+
+    def schedule(self, stored=None):
+        """
+        Every installment in order. Lazy schedules fill the numbers without a stored
+        row with unsaved (id-less, pending) installments computed from the dates.
+        `stored` may pass the EMI's already loaded rows.
+        """
+        if stored is None:
+            stored = self.installments.all()
+        if not self.lazy_schedule:
+            return stored
+        by_number = {installment.installment_number: installment for installment in stored}
+        return [
+            by_number.get(number) or self.build_installment(number)
+            for number in range(1, self.total_installments + 1)
+        ]
+
+    def pending_installments(self, limit=None, stored=None):
+        """The first `limit` (default all) unpaid installments, stored or computed"""
+        pending = [installment for installment in self.schedule(stored) if installment.status == Installment.PENDING]
+        return pending if limit is None else pending[:limit]
+
+    def materialize_installment(self, number):
+        """Stored row for installment `number`, inserting it first on a lazy schedule"""
+        if not 1 <= number <= self.total_installments:
+            raise Installment.DoesNotExist(f'{self} has no installment {number}.')
+        if self.lazy_schedule:
+            Installment.objects.bulk_create([self.build_installment(number)], ignore_conflicts=True)
+        return self.installments.get(installment_number=number)
 
-        total_days = (self.end_date - self.start_date).days
-        interval = total_days / (self.total_installments - 1)
-        
-        for i in range(self.total_installments):
-            due_date = self.start_date + timedelta(days=round(i * interval))
-            Installment.objects.create(
-                emi=self,
-                installment_number=i + 1,
-                due_date=due_date,
-                amount=self.installment_amount
+    @staticmethod
+    def add_paid_installments(counts):
+        """
+        Apply {emi_id: change in paid installments} and derive each EMI's status
+        from its counter, one UPDATE per EMI (no rescan of the installments).
+        """
+        for emi_id, delta in counts.items():
+            paid = F('paid_count') + delta
+            EMI.objects.filter(pk=emi_id).update(
+                paid_count=paid,
+                status=Case(
+                    When(total_installments__lte=paid, then=Value(EMI.COMPLETED)),
+                    default=Value(EMI.ACTIVE),
+                ),
             )
 
     @property
@@ -81,6 +154,12 @@ class Installment(models.Model):
     class Meta:
         ordering = ['installment_number']
         unique_together = ('emi', 'installment_number')
+        indexes = [
+            # Keyset pagination order of the installment list
+            models.Index(fields=['due_date', 'id'], name='installment_keyset_idx'),
+            # Pending installments due in a date range, across EMIs (calendar, overdue, dashboard)
+            models.Index(fields=['status', 'due_date'], name='installment_status_due_idx'),
+        ]
     
     def __str__(self):
         return f"{self.emi.title} - Installment {self.installment_number}"
@@ -1,6 +1,13 @@
+from decimal import Decimal
+
 from rest_framework import serializers
+from .amortization import level_payment
 from .models import EMI, Installment
 
+MAX_SCENARIOS = 1000
+MAX_TENURE = 600
+MAX_BULK_PAYMENTS = 1000
+
 class InstallmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Installment
@@ -8,8 +15,12 @@ class InstallmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'installment_number', 'due_date', 'amount']
 
 class EMISerializer(serializers.ModelSerializer):
-    installments = InstallmentSerializer(many=True, read_only=True)
+    # Lazy schedules include computed, not yet stored installments (with a null id)
+    installments = InstallmentSerializer(source='schedule', many=True, read_only=True)
     total_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    # Annotated by EMIViewSet.get_queryset
+    paid_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    next_due_date = serializers.SerializerMethodField()
     remaining_amount = serializers.SerializerMethodField()
     progress = serializers.SerializerMethodField()
     
@@ -17,20 +28,81 @@ class EMISerializer(serializers.ModelSerializer):
         model = EMI
         fields = [
             'id', 'title', 'start_date', 'end_date', 'total_installments', 
-            'installment_amount', 'total_amount', 'remaining_amount', 
-            'status', 'progress', 'installments', 'created_at'
+            'installment_amount', 'principal', 'interest_rate', 'total_amount', 'paid_count', 'paid_amount', 'remaining_amount',
+            'next_due_date', 'status', 'progress', 'lazy_schedule', 'installments', 'created_at'
         ]
         read_only_fields = ('user', 'status', 'installments', 'created_at')
+        # Derived from principal and interest rate when those are given
+        extra_kwargs = {'installment_amount': {'required': False}}
+
+    def validate(self, attrs):
+        principal = attrs.get('principal', getattr(self.instance, 'principal', None))
+        interest_rate = attrs.get('interest_rate', getattr(self.instance, 'interest_rate', None))
+        if (principal is None) != (interest_rate is None):
+            raise serializers.ValidationError("Principal and interest rate must be given together.")
+        if self.instance is None and 'installment_amount' not in attrs:
+            if principal is None:
+                raise serializers.ValidationError({'installment_amount': 'This field is required.'})
+            payment = level_payment(principal, interest_rate, attrs['total_installments'])
+            attrs['installment_amount'] = Decimal(str(round(float(payment), 2)))
+        return attrs
+
+    def validate_lazy_schedule(self, value):
+        if self.instance is not None and value != self.instance.lazy_schedule:
+            raise serializers.ValidationError("The schedule mode cannot be changed after creation.")
+        return value
+
+    def get_next_due_date(self, obj):
+        if not obj.lazy_schedule:
+            return obj.next_due_date
+        # Pending installments of lazy schedules are not rows; use the loaded paid ones
+        pending = obj.pending_installments(1, stored=getattr(obj, 'stored_installments', None))
+        return pending[0].due_date if pending else None
 
     def get_remaining_amount(self, obj):
-        total_paid = obj.installments.filter(status='PAID').count()
-        remaining_installments = obj.total_installments - total_paid
+        remaining_installments = obj.total_installments - obj.paid_count
         return remaining_installments * obj.installment_amount
 
     def get_progress(self, obj):
         total = obj.total_installments
         if total == 0:
             return 0
-        paid = obj.installments.filter(status='PAID').count()
-        return round((paid / total) * 100, 2)
+        return round((obj.paid_count / total) * 100, 2)
+
+
+class EMISummarySerializer(EMISerializer):
+    """EMI list rows without the nested schedule"""
+
+    class Meta(EMISerializer.Meta):
+        fields = [field for field in EMISerializer.Meta.fields if field != 'installments']
+
+
+class PrepaymentSerializer(serializers.Serializer):
+    month = serializers.IntegerField(min_value=1, max_value=MAX_TENURE)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class ScenarioSerializer(serializers.Serializer):
+    tenure = serializers.IntegerField(min_value=1, max_value=MAX_TENURE, required=False)
+    extra_monthly = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.00'), required=False)
+    prepayments = PrepaymentSerializer(many=True, required=False)
+
+
+class WhatIfSerializer(serializers.Serializer):
+    scenarios = ScenarioSerializer(many=True, allow_empty=False, max_length=MAX_SCENARIOS)
+
+
+class BulkPaySerializer(serializers.Serializer):
+    """Installment ids, or every installment due up to `due_by` (optionally of one EMI)"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=MAX_BULK_PAYMENTS
+    )
+    due_by = serializers.DateField(required=False)
+    emi = serializers.IntegerField(required=False)
 
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('due_by' in attrs):
+            raise serializers.ValidationError("Give either ids or due_by.")
+        if 'emi' in attrs and 'ids' in attrs:
+            raise serializers.ValidationError("emi only applies with due_by.")
+        return attrs
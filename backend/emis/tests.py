@@ -1,3 +1,168 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.cache import response_cache
+from .models import EMI, Installment
+from .serializers import InstallmentSerializer
+from .views import InstallmentViewSet, pay_installment
+
+
+class EMIsAPITestCase(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.user = User.objects.create_user('alice', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def emi(self, title='Phone', installments=4, lazy=False, start=date(2026, 1, 1)):
+        return EMI.objects.create(
+            user=self.user, title=title, start_date=start, end_date=start.replace(year=start.year + 1),
+            total_installments=installments, installment_amount=Decimal('25.00'), lazy_schedule=lazy,
+        )
+
+    def assertPaidCount(self, emi, expected, status=EMI.ACTIVE):
+        emi.refresh_from_db()
+        self.assertEqual(emi.paid_count, Installment.objects.filter(emi=emi, status=Installment.PAID).count())
+        self.assertEqual((emi.paid_count, emi.status), (expected, status))
+
+
+class LazyScheduleTests(EMIsAPITestCase):
+    def test_schedule_is_computed_until_paid(self):
+        emi = self.emi(lazy=True)
+        self.assertFalse(emi.installments.exists())
+
+        detail = self.client.get(f'/api/emis/{emi.id}/').data
+        self.assertEqual([row['installment_number'] for row in detail['installments']], [1, 2, 3, 4])
+        self.assertEqual({row['id'] for row in detail['installments']}, {None})
+
+        response = self.client.post(f'/api/emis/{emi.id}/pay_installment/', {'installment_number': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(emi.installments.values_list('installment_number', 'status')), [(2, Installment.PAID)])
+        self.assertPaidCount(emi, 1)
+
+        statuses = [row['status'] for row in self.client.get(f'/api/emis/{emi.id}/').data['installments']]
+        self.assertEqual(statuses, [Installment.PENDING, Installment.PAID, Installment.PENDING, Installment.PENDING])
+
+    def test_pay_and_unpay_keep_the_counter(self):
+        emi = self.emi(installments=2, lazy=True)
+        for number in (1, 2):
+            self.client.post(f'/api/emis/{emi.id}/pay_installment/', {'installment_number': number})
+        self.assertPaidCount(emi, 2, EMI.COMPLETED)
+
+        stored = emi.installments.get(installment_number=2)
+        response = self.client.patch(f'/api/installments/{stored.id}/', {'status': Installment.PENDING})
+        self.assertEqual(response.status_code, 200)
+        self.assertPaidCount(emi, 1)
+
+        self.client.delete(f'/api/installments/{emi.installments.get(installment_number=1).id}/')
+        self.assertPaidCount(emi, 0)
+
+    def test_paying_twice_or_out_of_range_is_rejected(self):
+        emi = self.emi(lazy=True)
+        url = f'/api/emis/{emi.id}/pay_installment/'
+        self.client.post(url, {'installment_number': 1})
+        self.assertEqual(self.client.post(url, {'installment_number': 1}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'installment_number': 5}).status_code, 404)
+        self.assertPaidCount(emi, 1)
+
+
+class ConcurrentPaymentTests(EMIsAPITestCase):
+    """A request that loaded the installment before another request paid it must not count it again"""
+
+    def test_mark_paid_with_a_stale_read(self):
+        emi = self.emi(installments=2)
+        stale = emi.installments.get(installment_number=1)
+        self.client.post(f'/api/installments/{stale.id}/mark_paid/')
+
+        response = pay_installment(stale)
+        self.assertEqual(response.status_code, 400)
+        self.assertPaidCount(emi, 1)
+
+    def test_update_and_delete_with_a_stale_read(self):
+        emi = self.emi(installments=2)
+        stale = emi.installments.get(installment_number=1)
+        self.client.post(f'/api/installments/{stale.id}/mark_paid/')
+
+        serializer = InstallmentSerializer(stale, data={'status': Installment.PAID}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        InstallmentViewSet().perform_update(serializer)
+        self.assertPaidCount(emi, 1)
+
+        stale = emi.installments.get(installment_number=2)
+        self.client.patch(f'/api/installments/{stale.id}/', {'status': Installment.PAID})
+        self.assertPaidCount(emi, 2, EMI.COMPLETED)
+        stale.status = Installment.PENDING
+        InstallmentViewSet().perform_destroy(stale)
+        self.assertPaidCount(emi, 1)
+
+    def test_paying_bumps_the_data_version(self):
+        emi = self.emi(installments=2)
+        before = self.client.get('/api/emis/')['ETag']
+        self.client.post(f'/api/installments/{emi.installments.first().id}/mark_paid/')
+        self.assertNotEqual(self.client.get('/api/emis/')['ETag'], before)
+
+
+class BulkPayTests(EMIsAPITestCase):
+    def bulk_pay(self, payload):
+        return self.client.post('/api/installments/bulk_pay/', payload, format='json')
+
+    def test_pay_by_ids(self):
+        emi = self.emi(installments=2)
+        ids = list(emi.installments.values_list('id', flat=True))
+        response = self.bulk_pay({'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'paid': 2, 'total': 50.0, 'completed': [emi.id]})
+        self.assertPaidCount(emi, 2, EMI.COMPLETED)
+
+    def test_one_unpayable_id_writes_nothing(self):
+        emi = self.emi()
+        first, second = emi.installments.values_list('id', flat=True)[:2]
+        self.client.post(f'/api/installments/{second}/mark_paid/')
+
+        response = self.bulk_pay({'ids': [first, second, 999]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['ids'], [second, 999])
+        self.assertEqual(Installment.objects.get(pk=first).status, Installment.PENDING)
+        self.assertPaidCount(emi, 1)
+
+    def test_due_by_includes_lazy_schedules(self):
+        stored = self.emi(installments=4)
+        lazy = self.emi(title='Laptop', installments=4, lazy=True)
+        # Four installments over a year: due Jan 1, May 2, Sep 1 and Jan 1
+        response = self.bulk_pay({'due_by': '2026-06-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['paid'], response.data['total']), (4, 100.0))
+        self.assertPaidCount(stored, 2)
+        self.assertPaidCount(lazy, 2)
+        self.assertEqual(sorted(lazy.installments.values_list('installment_number', flat=True)), [1, 2])
+
+        again = self.bulk_pay({'due_by': '2026-06-30', 'emi': lazy.id})
+        self.assertEqual(again.data['paid'], 0)
+        self.assertPaidCount(lazy, 2)
+
+    def test_failure_after_writing_rolls_back(self):
+        stored = self.emi(installments=2)
+        lazy = self.emi(title='Laptop', installments=2, lazy=True)
+        with mock.patch.object(EMI, 'add_paid_installments', side_effect=RuntimeError('counter down')):
+            with self.assertRaises(RuntimeError):
+                self.bulk_pay({'due_by': '2027-12-31'})
+
+        self.assertFalse(Installment.objects.filter(status=Installment.PAID).exists())
+        self.assertFalse(lazy.installments.exists())
+        self.assertPaidCount(stored, 0)
+        self.assertPaidCount(lazy, 0)
+
+    def test_completed_emis_are_skipped(self):
+        emi = self.emi(installments=2)
+        # Completed by hand with installments still pending
+        EMI.objects.filter(pk=emi.pk).update(status=EMI.COMPLETED)
 
-# Create your tests here.
+        response = self.bulk_pay({'ids': list(emi.installments.values_list('id', flat=True))})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.bulk_pay({'due_by': '2027-12-31'}).data['paid'], 0)
+        self.assertFalse(emi.installments.filter(status=Installment.PAID).exists())
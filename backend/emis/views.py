@@ -2,48 +2,346 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db import transaction
+from django.db.models import Min, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+import numpy as np
+from core.cache import bump_data_version, cached_response
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from . import amortization
+from .due import pending_installments
 from .models import EMI, Installment
-from .serializers import EMISerializer, InstallmentSerializer
+from .serializers import (
+    BulkPaySerializer, EMISerializer, EMISummarySerializer, InstallmentSerializer, WhatIfSerializer
+)
 
-class EMIViewSet(viewsets.ModelViewSet):
+CALENDAR_DEFAULT_DAYS = 30
+CALENDAR_MAX_DAYS = 366
+
+class EMIViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = EMISerializer
     permission_classes = [permissions.IsAuthenticated]
+    data_modules = ('emis',)
+
+    def is_summary(self):
+        return self.action == 'list' and self.request.query_params.get('summary', '').lower() in ('1', 'true', 'yes')
+
+    def get_serializer_class(self):
+        """`?summary=true` lists EMIs without their installments"""
+        if self.is_summary():
+            return EMISummarySerializer
+        return EMISerializer
 
     def get_queryset(self):
-        return EMI.objects.filter(user=self.request.user).order_by('-created_at')
+        """Installment progress is aggregated per EMI in the same query"""
+        paid = Q(installments__status=Installment.PAID)
+        queryset = EMI.objects.filter(user=self.request.user).annotate(
+            paid_amount=Coalesce(Sum('installments__amount', filter=paid), Decimal('0.00')),
+            next_due_date=Min('installments__due_date', filter=Q(installments__status=Installment.PENDING)),
+        ).order_by('-created_at')
+        if self.is_summary():
+            # Only lazy schedules need their stored rows to find the next due date
+            return queryset.prefetch_related(Prefetch(
+                'installments', queryset=Installment.objects.filter(emi__lazy_schedule=True),
+                to_attr='stored_installments',
+            ))
+        if self.action in ('list', 'retrieve'):
+            return queryset.prefetch_related('installments')
+        return queryset
+
+    @cached_response('emis')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        # Reload with the progress annotations the serializer reads
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+    @action(detail=True, methods=['get'])
+    def amortization(self, request, pk=None):
+        """Reducing-balance schedule: principal / interest split and balance per installment"""
+        emi = self.get_object()
+        if not emi.is_amortized:
+            return Response({"error": "This EMI has no principal and interest rate."}, status=status.HTTP_400_BAD_REQUEST)
+
+        principal, rate, months = float(emi.principal), float(emi.interest_rate), emi.total_installments
+        result = amortization.simulate(
+            principal, rate, float(emi.installment_amount), np.zeros((1, months))
+        )
+        balance, interest, repaid = result['balance'][0], result['interest'][0], result['principal'][0].copy()
+        if result['months'][0] > months:
+            # A rounded (or hand-set) installment leaves a remainder; the last one settles it
+            repaid[-1] += balance[-1]
+            balance[-1] = 0.0
+        schedule = [
+            {
+                'installment_number': number,
+                'due_date': emi.due_date_for(number),
+                'payment': round(float(interest[number - 1] + repaid[number - 1]), 2),
+                'principal': round(float(repaid[number - 1]), 2),
+                'interest': round(float(interest[number - 1]), 2),
+                'balance': round(float(balance[number - 1]), 2),
+            }
+            for number in range(1, min(int(result['months'][0]), months) + 1)
+        ]
+        paid = min(emi.paid_count, len(schedule))
+        return Response({
+            'principal': principal,
+            'interest_rate': rate,
+            'payment': float(emi.installment_amount),
+            'total_interest': round(float(result['total_interest'][0]), 2),
+            'outstanding_principal': round(float(balance[paid - 1]) if paid else principal, 2),
+            'schedule': schedule,
+        })
+
+    @action(detail=True, methods=['post'])
+    def what_if(self, request, pk=None):
+        """
+        Compare prepayment / tenure scenarios from the current outstanding principal:
+        {"scenarios": [{"tenure": 120}, {"extra_monthly": "5000"},
+                       {"prepayments": [{"month": 12, "amount": "200000"}]}]}
+        Months count from the next installment.
+        """
+        emi = self.get_object()
+        if not emi.is_amortized:
+            return Response({"error": "This EMI has no principal and interest rate."}, status=status.HTTP_400_BAD_REQUEST)
+        remaining = emi.total_installments - emi.paid_count
+        if remaining <= 0:
+            return Response({"error": "This EMI has no installments left."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = WhatIfSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        principal, rate = float(emi.principal), float(emi.interest_rate)
+        outstanding = amortization.outstanding_principal(principal, rate, float(emi.installment_amount), emi.paid_count)
+        result = amortization.what_if(outstanding, rate, remaining, serializer.validated_data['scenarios'])
+        return Response({'outstanding_principal': round(outstanding, 2), **result})
+
+    @action(detail=True, methods=['get'])
+    def installments(self, request, pk=None):
+        """
+        The EMI's installments by number, cursor-paginated; `?status=PENDING|PAID` filters.
+        Lazy schedules page through their computed installments as well.
+        """
+        emi = self.get_object()
+        installment_status = request.query_params.get('status')
+        if installment_status not in (None, Installment.PENDING, Installment.PAID):
+            return Response({"error": "status must be PENDING or PAID."}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = KeysetPagination()
+        paginator.ordering = ('installment_number',)
+        if emi.lazy_schedule:
+            rows = [
+                installment for installment in emi.schedule()
+                if installment_status is None or installment.status == installment_status
+            ]
+            page = paginator.paginate_sequence(rows, request)
+        else:
+            queryset = emi.installments.all()
+            if installment_status:
+                queryset = queryset.filter(status=installment_status)
+            page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(InstallmentSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['post'])
+    @transaction.atomic
+    def pay_installment(self, request, pk=None):
+        """
+        Mark installment `installment_number` paid. Works on both schedule modes;
+        on a lazy schedule this is what stores the installment.
+        """
+        emi = self.get_object()
+        try:
+            number = int(request.data.get('installment_number'))
+        except (TypeError, ValueError):
+            return Response({"error": "installment_number must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            installment = emi.materialize_installment(number)
+        except Installment.DoesNotExist:
+            return Response({"error": f"Installment {number} does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        return pay_installment(installment)
 
-class InstallmentViewSet(viewsets.ModelViewSet):
+class InstallmentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = InstallmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    data_modules = ('emis',)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('due_date', 'id')
 
     def get_queryset(self):
         return Installment.objects.filter(emi__user=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    @cached_response('emis')
+    def calendar(self, request):
+        """
+        Pending installments of all active EMIs due within ?start=YYYY-MM-DD&end=YYYY-MM-DD
+        (default: the next 30 days, at most a year), by due date.
+        """
+        today = timezone.now().date()
+        window = {'start': today, 'end': today + timedelta(days=CALENDAR_DEFAULT_DAYS)}
+        for param in window:
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    window[param] = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    return Response({"error": f"{param} must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        start, end = window['start'], window['end']
+        if end < start or (end - start).days > CALENDAR_MAX_DAYS:
+            return Response(
+                {"error": f"end must be on or after start and at most {CALENDAR_MAX_DAYS} days later"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = pending_installments(request.user.pk, start, end)
+        return Response({
+            'start': start,
+            'end': end,
+            'count': len(rows),
+            'total': float(sum(row['amount'] for row in rows)),
+            'installments': [{**row, 'amount': float(row['amount'])} for row in rows],
+        })
+
+    @action(detail=False, methods=['get'])
+    @cached_response('emis')
+    def overdue(self, request):
+        """Pending installments of active EMIs past their due date, oldest first"""
+        today = timezone.now().date()
+        rows = pending_installments(request.user.pk, end=today - timedelta(days=1))
+        return Response({
+            'count': len(rows),
+            'total': float(sum(row['amount'] for row in rows)),
+            'installments': [
+                {**row, 'amount': float(row['amount']), 'days_overdue': (today - row['due_date']).days}
+                for row in rows
+            ],
+        })
+
+    def locked_status(self, installment):
+        """
+        The stored status, read under a row lock: of two concurrent changes the
+        second sees the first one's result instead of counting it again.
+        """
+        return Installment.objects.select_for_update().values_list('status', flat=True).get(pk=installment.pk)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        was_paid = self.locked_status(serializer.instance) == Installment.PAID
+        installment = serializer.save()
+        is_paid = installment.status == Installment.PAID
+        if was_paid != is_paid:
+            EMI.add_paid_installments({installment.emi_id: 1 if is_paid else -1})
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        if self.locked_status(instance) == Installment.PAID:
+            EMI.add_paid_installments({instance.emi_id: -1})
+        instance.delete()
+
     @action(detail=True, methods=['post'])
     @transaction.atomic
     def mark_paid(self, request, pk=None):
-        installment = self.get_object()
-        emi = installment.emi
+        return pay_installment(self.get_object())
+
+    @action(detail=False, methods=['post'])
+    def bulk_pay(self, request):
+        """
+        Mark many pending installments of active EMIs paid at once, either
+        {"ids": [12, 13]} (all must be payable, or nothing is written) or
+        {"due_by": "YYYY-MM-DD"[, "emi": 4]} for everything due up to that day,
+        computed installments of lazy schedules included.
+        Response: {"paid": 3, "total": 300.0, "completed": [4]}
+        """
+        serializer = BulkPaySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids, due_by, emi_id = (serializer.validated_data.get(key) for key in ('ids', 'due_by', 'emi'))
+
+        today = timezone.now().date()
+        payable = Installment.objects.filter(
+            emi__user=request.user, emi__status=EMI.ACTIVE, status=Installment.PENDING
+        )
+        with transaction.atomic():
+            if ids:
+                payable = payable.filter(pk__in=ids)
+            else:
+                payable = payable.filter(due_date__lte=due_by)
+                if emi_id:
+                    payable = payable.filter(emi_id=emi_id)
+            # Lock the rows being paid; counts per EMI come from the same read
+            rows = list(payable.select_for_update().values_list('pk', 'emi_id', 'amount'))
+            if ids:
+                missing = sorted(set(ids) - {pk for pk, _, _ in rows})
+                if missing:
+                    return Response(
+                        {"error": "Installments not found or not payable", "ids": missing},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+            counts, total = {}, Decimal('0.00')
+            for _, row_emi, amount in rows:
+                counts[row_emi] = counts.get(row_emi, 0) + 1
+                total += amount
+            Installment.objects.filter(
+                pk__in=[pk for pk, _, _ in rows], status=Installment.PENDING
+            ).update(status=Installment.PAID, paid_date=today)
+
+            if due_by:
+                # Lazy schedules store their due installments as they are paid
+                lazy = EMI.objects.filter(user=request.user, status=EMI.ACTIVE, lazy_schedule=True)
+                if emi_id:
+                    lazy = lazy.filter(pk=emi_id)
+                created = []
+                for emi in lazy.prefetch_related('installments'):
+                    stored = {installment.installment_number for installment in emi.installments.all()}
+                    for number in emi.numbers_due_between(end=due_by):
+                        if number not in stored:
+                            installment = emi.build_installment(number)
+                            installment.status = Installment.PAID
+                            installment.paid_date = today
+                            created.append(installment)
+                            counts[emi.pk] = counts.get(emi.pk, 0) + 1
+                            total += installment.amount
+                Installment.objects.bulk_create(created, batch_size=500)
+
+            EMI.add_paid_installments(counts)
+            # update() and bulk_create send no signals
+            if counts:
+                bump_data_version(request.user.pk, 'emis')
+            completed = list(
+                EMI.objects.filter(pk__in=counts, status=EMI.COMPLETED).values_list('pk', flat=True)
+            )
+
+        return Response({
+            'paid': sum(counts.values()),
+            'total': float(total),
+            'completed': completed,
+        })
 
-        if emi.status == EMI.COMPLETED:
-            return Response({"error": "This EMI is already completed."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if installment.status == Installment.PAID:
-            return Response({"error": "Installment is already paid."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update installment
-        installment.status = Installment.PAID
-        installment.paid_date = timezone.now().date()
-        installment.save()
+def pay_installment(installment):
+    """Mark one stored installment paid; the EMI completes when its paid counter reaches the total"""
+    emi = installment.emi
 
-        # Check if all installments are paid
-        if not emi.installments.filter(status=Installment.PENDING).exists():
-            emi.status = EMI.COMPLETED
-            emi.save()
+    if emi.status == EMI.COMPLETED:
+        return Response({"error": "This EMI is already completed."}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(InstallmentSerializer(installment).data)
+    # Conditional transition: of two concurrent requests only one moves the row to PAID
+    # and counts it
+    paid = Installment.objects.filter(pk=installment.pk).exclude(status=Installment.PAID).update(
+        status=Installment.PAID, paid_date=timezone.now().date()
+    )
+    if not paid:
+        return Response({"error": "Installment is already paid."}, status=status.HTTP_400_BAD_REQUEST)
+    EMI.add_paid_installments({emi.pk: 1})
+    # update() sends no post_save
+    bump_data_version(emi.user_id, 'emis')
 
+    installment.refresh_from_db()
+    return Response(InstallmentSerializer(installment).data)
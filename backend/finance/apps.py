@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class FinanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finance'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from core.cache import track_model_changes
+        from .models import Category, Item, DailyExpense, ExpenseItem
+        track_model_changes('finance', {
+            Category: 'user_id',
+            Item: 'user_id',
+            DailyExpense: 'user_id',
+            ExpenseItem: 'daily_expense.user_id',
+        })
@@ -0,0 +1,130 @@
+"""
+Streaming exports for the finance app.
+
+Rows are read through chunked `.iterator()` queries and written out as they
+arrive, so memory stays flat regardless of the date range and the header
+reaches the client before the query has finished.
+"""
+import csv
+import json
+from calendar import month_name
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+
+from .models import Item, ExpenseItem
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer"""
+    def write(self, value):
+        return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(header, rows):
+    yield json.dumps(header) + '\n'
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def iter_tabular_rows(user, item_ids, start_date, end_date, group_by, chunk_size=CHUNK_SIZE):
+    """
+    Yield (key, [amount per item in item_ids order]) in key order, one row at a time.
+    Keys are dates for `daily` and (year, month) tuples for `monthly`.
+    """
+    position = {item_id: n for n, item_id in enumerate(item_ids)}
+
+    expenses = ExpenseItem.objects.filter(
+        daily_expense__user=user,
+        daily_expense__date__gte=start_date,
+        daily_expense__date__lte=end_date
+    ).order_by('daily_expense__date', 'id').values_list(
+        'daily_expense__date', 'item_id', 'amount'
+    ).iterator(chunk_size=chunk_size)
+
+    current, values = None, None
+    for day, item_id, amount in expenses:
+        key = day if group_by == 'daily' else (day.year, day.month)
+        if key != current:
+            if current is not None:
+                yield current, values
+            current, values = key, [Decimal('0.00')] * len(item_ids)
+        column = position.get(item_id)
+        if column is not None:
+            values[column] += amount
+    if current is not None:
+        yield current, values
+
+
+def stream_tabular_report(user, start_date, end_date, group_by, fmt):
+    items = list(Item.objects.filter(user=user).order_by('name').values_list('id', 'name'))
+    item_ids = [item_id for item_id, _ in items]
+    item_names = [name for _, name in items]
+    first = 'Date' if group_by == 'daily' else 'Month'
+    columns = [first] + item_names + ['Total']
+
+    def labelled():
+        for key, values in iter_tabular_rows(user, item_ids, start_date, end_date, group_by):
+            if group_by == 'daily':
+                label, extra = key.strftime('%Y-%m-%d'), {}
+            else:
+                year, month = key
+                label, extra = f"{month_name[month]} {year}", {'month_key': f"{year}-{month:02d}"}
+            yield label, extra, values, sum(values, Decimal('0.00'))
+
+    if fmt == 'csv':
+        rows = ([label, *values, total] for label, _, values, total in labelled())
+        lines = _csv_lines(columns, rows)
+    else:
+        key_field = 'date' if group_by == 'daily' else 'month'
+
+        def as_dicts():
+            for label, extra, values, total in labelled():
+                row = {key_field: label, **extra}
+                row.update(zip(item_names, map(float, values)))
+                row['total'] = float(total)
+                yield row
+
+        lines = _ndjson_lines({'columns': columns, 'group_by': group_by}, as_dicts())
+
+    return _streaming_response(lines, fmt, f"tabular_report_{start_date}_{end_date}_{group_by}")
+
+
+def stream_expense_items(user, start_date=None, end_date=None, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Raw line-item export: one row per ExpenseItem, ordered by date"""
+    qs = ExpenseItem.objects.filter(daily_expense__user=user)
+    if start_date: qs = qs.filter(daily_expense__date__gte=start_date)
+    if end_date: qs = qs.filter(daily_expense__date__lte=end_date)
+
+    fields = ['id', 'date', 'item', 'item_name', 'category_name', 'amount']
+    rows = qs.order_by('daily_expense__date', 'id').values_list(
+        'id', 'daily_expense__date', 'item_id', 'item__name', 'item__category__name', 'amount'
+    ).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        lines = _csv_lines(fields, rows)
+    else:
+        lines = _ndjson_lines({'columns': fields}, (dict(zip(fields, row)) for row in rows))
+
+    suffix = f"{start_date or 'start'}_{end_date or 'end'}"
+    return _streaming_response(lines, fmt, f"expenses_{suffix}")
+
+
+def _streaming_response(lines, fmt, filename):
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,111 @@
+import random
+import time
+from calendar import month_name
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finance.models import Category, Item, DailyExpense, ExpenseItem
+from finance.pivot import build_tabular_report
+
+
+def legacy_tabular_report(user, start_date, end_date, group_by):
+    """The original row-by-row implementation, kept as the reference for comparison"""
+    qs = ExpenseItem.objects.filter(
+        daily_expense__user=user,
+        daily_expense__date__gte=start_date,
+        daily_expense__date__lte=end_date
+    ).select_related('item', 'daily_expense')
+
+    item_names = [item.name for item in Item.objects.filter(user=user).order_by('name')]
+    rows_dict = defaultdict(lambda: defaultdict(float))
+
+    for expense_item in qs:
+        day = expense_item.daily_expense.date
+        key = day.strftime('%Y-%m-%d') if group_by == 'daily' else f"{day.year}-{day.month:02d}"
+        rows_dict[key][expense_item.item.name] += float(expense_item.amount)
+
+    rows = []
+    for key in sorted(rows_dict.keys()):
+        if group_by == 'daily':
+            row = {'date': key}
+        else:
+            year, month = key.split('-')
+            row = {'month': f"{month_name[int(month)]} {year}", 'month_key': key}
+        total = 0.0
+        for item_name in item_names:
+            value = rows_dict[key].get(item_name, 0.0)
+            row[item_name] = value
+            total += value
+        row['total'] = total
+        rows.append(row)
+
+    first = 'Date' if group_by == 'daily' else 'Month'
+    return {'columns': [first] + item_names + ['Total'], 'rows': rows, 'group_by': group_by}
+
+
+class Command(BaseCommand):
+    help = 'Compare the legacy and vectorized tabular_report on synthetic data (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=730)
+        parser.add_argument('--items', type=int, default=300)
+        parser.add_argument('--entries-per-day', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            user = User.objects.create(username=f"bench-{time.time_ns()}")
+            start, end = self._seed(user, rng, options)
+            self.stdout.write(f"{ExpenseItem.objects.filter(daily_expense__user=user).count()} expense rows, "
+                              f"{options['items']} items, {start} .. {end}")
+
+            for group_by in ('daily', 'monthly'):
+                legacy_time, legacy = self._time(legacy_tabular_report, user, start, end, group_by, options['repeat'])
+                pivot_time, result = self._time(build_tabular_report, user, start, end, group_by, options['repeat'])
+                if legacy != result:
+                    raise CommandError(f'{group_by}: vectorized output differs from the legacy report')
+                self.stdout.write(
+                    f"{group_by:8} legacy {legacy_time * 1000:9.1f} ms   "
+                    f"vectorized {pivot_time * 1000:9.1f} ms   "
+                    f"speedup x{legacy_time / pivot_time:.1f}   (outputs identical)"
+                )
+
+            transaction.set_rollback(True)
+
+    def _seed(self, user, rng, options):
+        category = Category.objects.create(user=user, name='Bench')
+        items = Item.objects.bulk_create([
+            Item(user=user, category=category, name=f"Item {n:04d}") for n in range(options['items'])
+        ])
+        start = date(2020, 1, 1)
+        days = DailyExpense.objects.bulk_create([
+            DailyExpense(user=user, date=start + timedelta(days=n)) for n in range(options['days'])
+        ])
+        rows = [
+            ExpenseItem(
+                daily_expense=day,
+                item=rng.choice(items),
+                amount=Decimal(rng.randint(1, 500000)) / 100,
+            )
+            for day in days
+            for _ in range(options['entries_per_day'])
+        ]
+        ExpenseItem.objects.bulk_create(rows, batch_size=2000)
+        return start, start + timedelta(days=options['days'] - 1)
+
+    def _time(self, func, user, start, end, group_by, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            began = time.perf_counter()
+            result = func(user, start, end, group_by)
+            elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,186 @@
+import csv
+import hashlib
+import time
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import bump_data_version
+from finance.models import Category, Item, DailyExpense, ExpenseItem
+from finance.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Import historical expenses from a CSV file with columns date, item, amount and '
+        'optionally category. Categories, items and days are created as needed; rows already '
+        'imported by a previous run are skipped, so re-running the same file is safe.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--user', required=True, help='Username that owns the imported expenses')
+        parser.add_argument('--date-format', default='%Y-%m-%d')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--default-category', default='Uncategorized',
+                            help='Category for rows without one (and for new items)')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            self.user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.date_format = options['date_format']
+        self.default_category = options['default_category']
+        # name -> id caches, loaded once and extended as rows create new names
+        self.categories = dict(Category.objects.filter(user=self.user).values_list('name', 'id'))
+        self.items = dict(Item.objects.filter(user=self.user).values_list('name', 'id'))
+        self.days = {}
+        # (daily_expense_id, import_key) of rows already in the database, loaded per existing day
+        self.imported = set()
+        # (daily_expense_id, item_id) rollup buckets to refresh once the rows are in
+        self.touched = set()
+        self.occurrences = Counter()
+        self.stats = Counter()
+        self.errors = []
+
+        started = time.perf_counter()
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as handle:
+                reader = csv.DictReader(handle, delimiter=options['delimiter'])
+                reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+                missing = {'date', 'item', 'amount'} - set(reader.fieldnames)
+                if missing:
+                    raise CommandError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+
+                chunk = []
+                for row in reader:
+                    parsed = self.parse(reader.line_num, row)
+                    if parsed:
+                        chunk.append(parsed)
+                    if len(chunk) >= options['chunk_size']:
+                        self.flush(chunk)
+                        chunk = []
+                        self.progress(started)
+                if chunk:
+                    self.flush(chunk)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        finally:
+            # Also after a failed chunk, so the chunks already committed are reflected
+            if self.touched:
+                refresh_rollups(self.touched)
+                bump_data_version(self.user.pk, 'finance')
+
+        elapsed = time.perf_counter() - started
+        for line, message in self.errors[:20]:
+            self.stderr.write(f'line {line}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {self.stats['read']} rows in {elapsed:.1f}s "
+            f"({self.stats['read'] / elapsed if elapsed else 0:,.0f} rows/s): "
+            f"{self.stats['inserted']} inserted, {self.stats['skipped']} already imported, "
+            f"{len(self.errors)} invalid; created {self.stats['categories']} categories, "
+            f"{self.stats['items']} items, {self.stats['days']} days"
+        ))
+
+    def parse(self, line, row):
+        self.stats['read'] += 1
+        try:
+            day = datetime.strptime((row.get('date') or '').strip(), self.date_format).date()
+            amount = Decimal((row.get('amount') or '').strip().replace(',', ''))
+        except (ValueError, InvalidOperation):
+            self.errors.append((line, 'invalid date or amount'))
+            return None
+        item = (row.get('item') or '').strip()[:100]
+        if not item or not amount.is_finite() or amount <= 0:
+            self.errors.append((line, 'item is required and amount must be positive'))
+            return None
+        amount = amount.quantize(Decimal('0.01'))
+        category = (row.get('category') or '').strip()[:100] or self.default_category
+
+        # Identical rows in one statement are distinct expenses: number them so each gets its own key
+        fingerprint = hashlib.sha1(f'{day.isoformat()}|{item}|{category}|{amount}'.encode()).digest()
+        self.occurrences[fingerprint] += 1
+        key = hashlib.sha1(fingerprint + str(self.occurrences[fingerprint]).encode()).hexdigest()
+        return day, item, category, amount, key
+
+    def flush(self, chunk):
+        with transaction.atomic():
+            self.resolve_items(chunk)
+            self.resolve_days({day for day, *_ in chunk})
+
+            new_rows = []
+            for day, item, _, amount, key in chunk:
+                if (self.days[day], key) in self.imported:
+                    continue
+                self.imported.add((self.days[day], key))
+                new_rows.append(ExpenseItem(
+                    daily_expense_id=self.days[day],
+                    item_id=self.items[item],
+                    amount=amount,
+                    import_key=key,
+                ))
+            # The unique (daily_expense, import_key) constraint catches rows a concurrent run added
+            ExpenseItem.objects.bulk_create(new_rows, batch_size=1000, ignore_conflicts=True)
+
+        self.touched.update((row.daily_expense_id, row.item_id) for row in new_rows)
+        self.stats['inserted'] += len(new_rows)
+        self.stats['skipped'] += len(chunk) - len(new_rows)
+
+    def resolve_items(self, chunk):
+        new_categories = {category for _, item, category, *_ in chunk
+                          if item not in self.items and category not in self.categories}
+        if new_categories:
+            Category.objects.bulk_create(
+                [Category(user=self.user, name=name) for name in new_categories], ignore_conflicts=True
+            )
+            self.categories.update(Category.objects.filter(
+                user=self.user, name__in=new_categories
+            ).values_list('name', 'id'))
+            self.stats['categories'] += len(new_categories)
+
+        # An existing item keeps its category; the CSV category only applies to new items
+        new_items = {item: category for _, item, category, *_ in chunk if item not in self.items}
+        if new_items:
+            Item.objects.bulk_create([
+                Item(user=self.user, name=name, category_id=self.categories[category])
+                for name, category in new_items.items()
+            ], ignore_conflicts=True)
+            self.items.update(Item.objects.filter(
+                user=self.user, name__in=new_items
+            ).values_list('name', 'id'))
+            self.stats['items'] += len(new_items)
+
+    def resolve_days(self, days):
+        missing = days - self.days.keys()
+        if not missing:
+            return
+        existing = dict(DailyExpense.objects.filter(
+            user=self.user, date__in=missing
+        ).values_list('date', 'id'))
+        if existing:
+            self.imported.update(ExpenseItem.objects.filter(
+                daily_expense_id__in=list(existing.values()), import_key__isnull=False
+            ).values_list('daily_expense_id', 'import_key'))
+        self.days.update(existing)
+        to_create = missing - self.days.keys()
+        if to_create:
+            DailyExpense.objects.bulk_create(
+                [DailyExpense(user=self.user, date=day) for day in to_create], ignore_conflicts=True
+            )
+            self.days.update(DailyExpense.objects.filter(
+                user=self.user, date__in=to_create
+            ).values_list('date', 'id'))
+            self.stats['days'] += len(to_create)
+
+    def progress(self, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  {self.stats['read']:,} rows ({self.stats['read'] / elapsed:,.0f} rows/s)"
+        )
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    ExpenseItem = apps.get_model('finance', 'ExpenseItem')
+    ExpenseRollup = apps.get_model('finance', 'ExpenseRollup')
+    rows = ExpenseItem.objects.values(
+        'daily_expense_id',
+        'item_id',
+        user_id=F('daily_expense__user_id'),
+        date=F('daily_expense__date'),
+        category_id=F('item__category_id'),
+    ).annotate(total=Sum('amount'), entry_count=Count('id')).order_by()
+    ExpenseRollup.objects.bulk_create(
+        [ExpenseRollup(**row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='finance.category')),
+                ('daily_expense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='finance.dailyexpense')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='finance.item')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='finance_exp_user_id_2015b1_idx'), models.Index(fields=['user', 'category', 'date'], name='finance_exp_user_id_bf4f19_idx')],
+                'unique_together': {('daily_expense', 'item')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
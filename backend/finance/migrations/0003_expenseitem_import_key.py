@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_expenserollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenseitem',
+            name='import_key',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='expenseitem',
+            constraint=models.UniqueConstraint(fields=('daily_expense', 'import_key'), name='unique_expense_import_key'),
+        ),
+    ]
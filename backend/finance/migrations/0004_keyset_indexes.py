@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_expenseitem_import_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyexpense',
+            index=models.Index(fields=['user', 'date', 'id'], name='dailyexpense_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:54
+
+import core.search
+from core.search import normalize_name
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_search_keys(apps, schema_editor):
+    for model_name in ('Category', 'Item'):
+        model = apps.get_model('finance', model_name)
+        rows = list(model.objects.only('id', 'name'))
+        for row in rows:
+            row.search_key = normalize_name(row.name)
+        model.objects.bulk_update(rows, ['search_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='search_key',
+            field=core.search.SearchKeyField(default='', editable=False, max_length=100, source='name'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='search_key',
+            field=core.search.SearchKeyField(default='', editable=False, max_length=100, source='name'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['user', 'search_key'], name='category_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['user', 'search_key'], name='item_search_idx'),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,20 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from decimal import Decimal
+from core.search import SearchKeyField
 
 class Category(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    search_key = SearchKeyField(source='name')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name_plural = "Categories"
         unique_together = ('user', 'name')
+        indexes = [
+            models.Index(fields=['user', 'search_key'], name='category_search_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -17,9 +23,13 @@ class Item(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, related_name='items', on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
-    
+    search_key = SearchKeyField(source='name')
+
     class Meta:
         unique_together = ('user', 'name')
+        indexes = [
+            models.Index(fields=['user', 'search_key'], name='item_search_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -32,6 +42,10 @@ class DailyExpense(models.Model):
     class Meta:
         unique_together = ('user', 'date')
         ordering = ['-date']
+        indexes = [
+            # Keyset pagination order (see core.pagination)
+            models.Index(fields=['user', 'date', 'id'], name='dailyexpense_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.date}"
@@ -40,6 +54,55 @@ class ExpenseItem(models.Model):
     daily_expense = models.ForeignKey(DailyExpense, related_name='expenses', on_delete=models.CASCADE)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Fingerprint of the source row for rows loaded by `import_expenses`, so re-runs skip them
+    import_key = models.CharField(max_length=40, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['daily_expense', 'import_key'], name='unique_expense_import_key'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the rollup key as loaded so edits can refresh the old bucket too
+        instance._loaded_rollup_key = (
+            instance.__dict__.get('daily_expense_id'),
+            instance.__dict__.get('item_id'),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The rollup refresh (post_save signal) must commit together with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.item.name}: {self.amount}"
+
+class ExpenseRollup(models.Model):
+    """
+    Pre-aggregated spend per user, day and item (category denormalized).
+    Maintained by finance.signals / finance.rollups - never edit directly.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    daily_expense = models.ForeignKey(DailyExpense, related_name='rollups', on_delete=models.CASCADE)
+    date = models.DateField()
+    item = models.ForeignKey(Item, related_name='rollups', on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, related_name='rollups', on_delete=models.CASCADE)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    entry_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('daily_expense', 'item')
+        indexes = [
+            models.Index(fields=['user', 'date']),
+            models.Index(fields=['user', 'category', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.item_id}: {self.total}"
@@ -0,0 +1,20 @@
+import json
+from rest_framework import renderers
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    Lets `?format=csv` pass content negotiation. Export actions stream their own
+    StreamingHttpResponse, so only error payloads are ever rendered here.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, default=str).encode(self.charset)
+
+
+class NDJSONRenderer(CSVRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -0,0 +1,128 @@
+"""
+Maintenance of the ExpenseRollup table.
+
+Every write to ExpenseItem refreshes the (daily_expense, item) buckets it
+touches by re-aggregating just those buckets from the raw rows, so the rollup
+is self-healing and report endpoints never need to scan the full history.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum, Count, F, Q
+from .models import ExpenseItem, ExpenseRollup
+
+# Days per refresh query; SQLite caps expression depth at 1000
+DAYS_PER_QUERY = 200
+
+
+def _aggregate(queryset):
+    """Group raw expense rows into rollup buckets."""
+    return queryset.values(
+        'daily_expense_id',
+        'item_id',
+        user_id=F('daily_expense__user_id'),
+        date=F('daily_expense__date'),
+        category_id=F('item__category_id'),
+    ).annotate(
+        total=Sum('amount'),
+        entry_count=Count('id'),
+    ).order_by()
+
+
+def _to_rollups(rows):
+    return [
+        ExpenseRollup(
+            user_id=row['user_id'],
+            daily_expense_id=row['daily_expense_id'],
+            date=row['date'],
+            item_id=row['item_id'],
+            category_id=row['category_id'],
+            total=row['total'] or Decimal('0.00'),
+            entry_count=row['entry_count'],
+        )
+        for row in rows
+    ]
+
+
+def _pair_filters(keys):
+    """
+    Q objects matching exactly the given (daily_expense_id, item_id) pairs, one
+    per batch of days (each day contributes `day AND item IN (...)`), so the
+    OR chain stays within SQLite's expression depth limit.
+    """
+    items_by_day = {}
+    for daily_id, item_id in keys:
+        items_by_day.setdefault(daily_id, set()).add(item_id)
+    days = sorted(items_by_day)
+    for start in range(0, len(days), DAYS_PER_QUERY):
+        condition = Q()
+        for daily_id in days[start:start + DAYS_PER_QUERY]:
+            condition |= Q(daily_expense_id=daily_id, item_id__in=items_by_day[daily_id])
+        yield condition
+
+
+def refresh_rollups(keys):
+    """
+    Recompute the rollup buckets for the given (daily_expense_id, item_id) pairs,
+    and only those. Three queries per DAYS_PER_QUERY days touched.
+    """
+    keys = {key for key in keys if None not in key}
+    if not keys:
+        return
+
+    with transaction.atomic():
+        for condition in _pair_filters(keys):
+            ExpenseRollup.objects.filter(condition).delete()
+            fresh = _aggregate(ExpenseItem.objects.filter(condition))
+            ExpenseRollup.objects.bulk_create(_to_rollups(fresh))
+
+
+def rebuild_rollups(user_ids, batch_size=1000):
+    """Drop and rebuild every rollup bucket for the given users."""
+    created = 0
+    with transaction.atomic():
+        ExpenseRollup.objects.filter(user_id__in=user_ids).delete()
+        fresh = _aggregate(
+            ExpenseItem.objects.filter(daily_expense__user_id__in=user_ids)
+        ).iterator(chunk_size=batch_size)
+
+        batch = []
+        for row in fresh:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                created += len(ExpenseRollup.objects.bulk_create(_to_rollups(batch)))
+                batch = []
+        if batch:
+            created += len(ExpenseRollup.objects.bulk_create(_to_rollups(batch)))
+    return created
+
+
+def check_rollups(user_ids):
+    """
+    Compare the rollup table against the raw rows.
+    Returns a list of mismatches as dicts (empty when consistent).
+    """
+    expected = {
+        (row['daily_expense_id'], row['item_id']): row
+        for row in _aggregate(ExpenseItem.objects.filter(daily_expense__user_id__in=user_ids))
+    }
+    mismatches = []
+    stored = ExpenseRollup.objects.filter(user_id__in=user_ids).values(
+        'daily_expense_id', 'item_id', 'user_id', 'date', 'category_id', 'total', 'entry_count'
+    )
+    for row in stored:
+        key = (row['daily_expense_id'], row['item_id'])
+        raw = expected.pop(key, None)
+        if raw is None:
+            mismatches.append({'key': key, 'problem': 'orphan rollup', 'stored': row['total']})
+            continue
+        for field in ('user_id', 'date', 'category_id', 'total', 'entry_count'):
+            if raw[field] != row[field]:
+                mismatches.append({
+                    'key': key,
+                    'problem': f'{field} differs',
+                    'stored': row[field],
+                    'expected': raw[field],
+                })
+    for key, raw in expected.items():
+        mismatches.append({'key': key, 'problem': 'missing rollup', 'expected': raw['total']})
+    return mismatches
@@ -1,31 +1,96 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import Category, Item, DailyExpense, ExpenseItem
 
-class CategorySerializer(serializers.ModelSerializer):
+
+def split_field_paths(paths):
+    """{'expenses.amount', 'date'} -> {'expenses': {'amount'}, 'date': set()}"""
+    tree = {}
+    for path in paths:
+        head, _, rest = path.partition('.')
+        tree.setdefault(head, set())
+        if rest:
+            tree[head].add(rest)
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Accepts `fields` / `expand` kwargs (sets of dotted paths) to trim the output.
+    `expandable_fields` maps a field name to a serializer class that replaces it
+    when expanded, e.g. `category` id -> nested category object.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if expand:
+            self.expand(expand)
+        if fields is not None:
+            self.restrict(fields)
+
+    def expand(self, paths):
+        for name, nested in split_field_paths(paths).items():
+            if name in self.expandable_fields and name in self.fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+            target = getattr(self.fields.get(name), 'child', self.fields.get(name))
+            if nested and isinstance(target, SparseFieldsMixin):
+                target.expand(nested)
+
+    def restrict(self, paths):
+        tree = split_field_paths(paths)
+        for name in list(self.fields):
+            if name not in tree:
+                self.fields.pop(name)
+        for name, nested in tree.items():
+            target = getattr(self.fields.get(name), 'child', self.fields.get(name))
+            if nested and isinstance(target, SparseFieldsMixin):
+                target.restrict(nested)
+
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = '__all__'
+        fields = ['id', 'user', 'name', 'created_at']
         read_only_fields = ('user',)
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
+    expandable_fields = {'category': CategorySerializer}
+
     class Meta:
         model = Item
-        fields = '__all__'
+        fields = ['id', 'user', 'category', 'category_name', 'name']
         read_only_fields = ('user',)
 
-class ExpenseItemSerializer(serializers.ModelSerializer):
+class ExpenseItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     item_name = serializers.CharField(source='item.name', read_only=True)
     category_name = serializers.CharField(source='item.category.name', read_only=True)
+    expandable_fields = {'item': ItemSerializer}
     
     class Meta:
         model = ExpenseItem
         fields = ['id', 'item', 'item_name', 'category_name', 'amount']
 
-class DailyExpenseSerializer(serializers.ModelSerializer):
+class DailyExpenseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     expenses = ExpenseItemSerializer(many=True, read_only=True)
     
     class Meta:
         model = DailyExpense
         fields = ['id', 'date', 'expenses', 'created_at']
         read_only_fields = ('user', 'created_at')
+
+class DailyExpenseCompactSerializer(serializers.Serializer):
+    """Flat per-day totals (no line items) for calendar views"""
+    id = serializers.IntegerField()
+    date = serializers.DateField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    entries = serializers.IntegerField()
+
+class ExpenseBatchRowSerializer(serializers.Serializer):
+    """One {date, item, amount} row of a batch expense entry"""
+    date = serializers.DateField()
+    item = serializers.IntegerField()
+    # Same rule as the CSV importer: an expense is a positive amount
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
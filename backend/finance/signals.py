@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Item, DailyExpense, ExpenseItem, ExpenseRollup
+from .rollups import refresh_rollups
+
+
+@receiver(post_save, sender=ExpenseItem)
+def refresh_rollup_on_save(sender, instance, **kwargs):
+    keys = {(instance.daily_expense_id, instance.item_id)}
+    # An edit that moved the row to another day or item also empties the old bucket
+    loaded = getattr(instance, '_loaded_rollup_key', None)
+    if loaded:
+        keys.add(loaded)
+    refresh_rollups(keys)
+    instance._loaded_rollup_key = (instance.daily_expense_id, instance.item_id)
+
+
+@receiver(post_delete, sender=ExpenseItem)
+def refresh_rollup_on_delete(sender, instance, **kwargs):
+    refresh_rollups({(instance.daily_expense_id, instance.item_id)})
+
+
+@receiver(post_save, sender=Item)
+def move_rollups_with_item(sender, instance, created, **kwargs):
+    """Keep the denormalized category in step when an item is re-categorized"""
+    if not created:
+        ExpenseRollup.objects.filter(item=instance).exclude(
+            category_id=instance.category_id
+        ).update(category_id=instance.category_id)
+
+
+@receiver(post_save, sender=DailyExpense)
+def move_rollups_with_day(sender, instance, created, **kwargs):
+    """Rollups copy the day's date and owner; follow an edited day"""
+    if not created:
+        ExpenseRollup.objects.filter(daily_expense=instance).exclude(
+            date=instance.date, user_id=instance.user_id
+        ).update(date=instance.date, user_id=instance.user_id)
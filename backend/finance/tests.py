@@ -1,3 +1,177 @@
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.cache import response_cache
+from .models import Category, Item, DailyExpense, ExpenseItem, ExpenseRollup
+from .rollups import check_rollups, refresh_rollups
+
+
+class FinanceAPITestCase(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.user = User.objects.create_user('alice', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(user=self.user, name='Food')
+        self.other_category = Category.objects.create(user=self.user, name='Travel')
+        self.item = Item.objects.create(user=self.user, category=self.category, name='Lunch')
+        self.other_item = Item.objects.create(user=self.user, category=self.other_category, name='Taxi')
+        self.day = DailyExpense.objects.create(user=self.user, date=date(2026, 3, 10))
+
+    def add(self, item, amount, day=None):
+        return ExpenseItem.objects.create(daily_expense=day or self.day, item=item, amount=Decimal(amount))
+
+    def assertRollupsConsistent(self):
+        self.assertEqual(check_rollups([self.user.id]), [])
+
+
+class RollupTests(FinanceAPITestCase):
+    def test_create_adds_to_bucket(self):
+        response = self.client.post(
+            f'/api/daily-expenses/{self.day.date}/add_item/', {'item': self.item.id, 'amount': '12.50'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.add(self.item, '7.50')
+
+        rollup = ExpenseRollup.objects.get(daily_expense=self.day, item=self.item)
+        self.assertEqual((rollup.total, rollup.entry_count), (Decimal('20.00'), 2))
+        self.assertRollupsConsistent()
+
+    def test_edit_moves_row_between_buckets(self):
+        expense = self.add(self.item, '10.00')
+        expense.item = self.other_item
+        expense.amount = Decimal('4.00')
+        expense.save()
+
+        self.assertFalse(ExpenseRollup.objects.filter(item=self.item).exists())
+        self.assertEqual(ExpenseRollup.objects.get(item=self.other_item).total, Decimal('4.00'))
+        self.assertRollupsConsistent()
+
+    def test_delete_empties_bucket(self):
+        expense = self.add(self.item, '10.00')
+        self.add(self.item, '5.00')
+        expense.delete()
+        self.assertEqual(ExpenseRollup.objects.get(item=self.item).total, Decimal('5.00'))
+
+        ExpenseItem.objects.all().delete()
+        self.assertFalse(ExpenseRollup.objects.exists())
+        self.assertRollupsConsistent()
+
+    def test_item_recategorized(self):
+        self.add(self.item, '10.00')
+        self.item.category = self.other_category
+        self.item.save()
+        self.assertEqual(ExpenseRollup.objects.get(item=self.item).category, self.other_category)
+        self.assertRollupsConsistent()
+
+    def test_date_move_follows_the_day(self):
+        self.add(self.item, '10.00')
+        response = self.client.patch(
+            f'/api/daily-expenses/{self.day.date}/', {'date': '2026-03-12'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(ExpenseRollup.objects.get(daily_expense=self.day).date, date(2026, 3, 12))
+        self.assertRollupsConsistent()
+        trend = self.client.get('/api/daily-expenses/reports/').data['daily_trend']
+        self.assertEqual([(str(row['date']), row['value']) for row in trend], [('2026-03-12', 10.0)])
+
+    def test_refresh_only_touches_given_pairs(self):
+        other_day = DailyExpense.objects.create(user=self.user, date=date(2026, 3, 11))
+        self.add(self.item, '1.00')
+        self.add(self.other_item, '2.00', day=other_day)
+        self.add(self.other_item, '3.00')
+        # Corrupt a bucket that is in the days x items cross product but not in the keys
+        ExpenseRollup.objects.filter(daily_expense=self.day, item=self.other_item).update(total=Decimal('99.00'))
+
+        refresh_rollups({(self.day.id, self.item.id), (other_day.id, self.other_item.id)})
+
+        self.assertEqual(
+            ExpenseRollup.objects.get(daily_expense=self.day, item=self.other_item).total, Decimal('99.00')
+        )
+        refresh_rollups({(self.day.id, self.other_item.id)})
+        self.assertRollupsConsistent()
+
+
+class CatalogAPITests(FinanceAPITestCase):
+    def test_search_key_is_internal(self):
+        category = self.client.get(f'/api/categories/{self.category.id}/').data
+        self.assertEqual(set(category), {'id', 'user', 'name', 'created_at'})
+        item = self.client.get(f'/api/items/{self.item.id}/').data
+        self.assertEqual(set(item), {'id', 'user', 'category', 'category_name', 'name'})
+
+        response = self.client.patch(f'/api/items/{self.item.id}/', {'name': 'Lunch Box', 'search_key': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.search_key, 'lunch box')
+
+
+class BatchTests(FinanceAPITestCase):
+    def test_rows_are_added_with_their_rollups(self):
+        response = self.client.post('/api/daily-expenses/batch/', {'rows': [
+            {'date': '2026-03-10', 'item': self.item.id, 'amount': '4.00'},
+            {'date': '2026-03-11', 'item': self.other_item.id, 'amount': '6.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['days_created']), (2, 1))
+        self.assertRollupsConsistent()
+
+    def test_zero_and_negative_amounts_are_rejected(self):
+        response = self.client.post('/api/daily-expenses/batch/', {'rows': [
+            {'date': '2026-03-10', 'item': self.item.id, 'amount': '4.00'},
+            {'date': '2026-03-10', 'item': self.item.id, 'amount': '0'},
+            {'date': '2026-03-10', 'item': self.item.id, 'amount': '-5'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([bool(row) for row in response.data['rows']], [False, True, True])
+        self.assertIn('amount', response.data['rows'][2])
+        self.assertFalse(ExpenseItem.objects.exists())
+
+
+class ImportExpensesTests(FinanceAPITestCase):
+    CSV = (
+        'Date,Item,Category,Amount\n'
+        '2026-03-10,Lunch,,12.50\n'
+        '2026-03-10,Lunch,,12.50\n'
+        '2026-03-11,Coffee,Drinks,3.00\n'
+        'not-a-date,Lunch,,1.00\n'
+    )
+
+    def import_csv(self, content):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w') as csv_file:
+            csv_file.write(content)
+        out = StringIO()
+        call_command('import_expenses', path, user='alice', chunk_size=2, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_rerun_imports_nothing(self):
+        first = self.import_csv(self.CSV)
+        self.assertIn('3 inserted, 0 already imported, 1 invalid', first)
+        # Identical rows in one file are separate expenses
+        self.assertEqual(ExpenseItem.objects.filter(daily_expense=self.day, item=self.item).count(), 2)
+        self.assertEqual(Item.objects.get(name='Coffee').category.name, 'Drinks')
+
+        second = self.import_csv(self.CSV)
+        self.assertIn('0 inserted, 3 already imported', second)
+        self.assertEqual(ExpenseItem.objects.count(), 3)
+        self.assertEqual(ExpenseRollup.objects.get(daily_expense=self.day, item=self.item).total, Decimal('25.00'))
+        self.assertRollupsConsistent()
+
+    def test_appended_rows_are_imported(self):
+        self.add(self.item, '4.00')
+        self.import_csv(self.CSV)
+        self.import_csv(self.CSV + '2026-03-10,Lunch,,12.50\n')
 
-# Create your tests here.
+        self.assertEqual(ExpenseItem.objects.filter(daily_expense=self.day, item=self.item).count(), 4)
+        self.assertEqual(ExpenseRollup.objects.get(daily_expense=self.day, item=self.item).total, Decimal('41.50'))
+        self.assertRollupsConsistent()
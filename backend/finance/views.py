@@ -1,36 +1,169 @@
-from django.db.models import Sum, F
-from django.db.models.functions import TruncMonth, TruncDay
+from decimal import Decimal
+from django.db.models import Sum, F, Prefetch
+from django.db.models.functions import TruncMonth, TruncDay, Coalesce
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import Category, Item, DailyExpense, ExpenseItem
-from .serializers import CategorySerializer, ItemSerializer, DailyExpenseSerializer, ExpenseItemSerializer
+from core.cache import cached_response, bump_data_version
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from .models import Category, Item, DailyExpense, ExpenseItem, ExpenseRollup
+from .exports import stream_tabular_report, stream_expense_items
+from .pivot import build_tabular_report
+from .renderers import CSVRenderer, NDJSONRenderer
+from .rollups import refresh_rollups
+from .serializers import (
+    CategorySerializer, ItemSerializer, DailyExpenseSerializer, ExpenseItemSerializer,
+    DailyExpenseCompactSerializer, ExpenseBatchRowSerializer,
+)
 
-class CategoryViewSet(viewsets.ModelViewSet):
+# Renderers for actions that accept ?format=csv|ndjson (the exports stream their own response)
+EXPORT_RENDERERS = list(api_settings.DEFAULT_RENDERER_CLASSES) + [CSVRenderer, NDJSONRenderer]
+
+MAX_BATCH_ROWS = 5000
+
+class SparseFieldsViewSetMixin:
+    """
+    GET support for ?fields=id,date,expenses.amount (dotted paths trim nested output)
+    and ?expand=category (nest related objects). Viewsets use `wants()` / `expands()`
+    to shape select_related/prefetch_related and only() to what is actually rendered.
+    """
+    def _query_paths(self, param):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        return {path.strip() for path in value.split(',') if path.strip()}
+
+    @property
+    def requested_fields(self):
+        return self._query_paths('fields')
+
+    @property
+    def requested_expansions(self):
+        return self._query_paths('expand') or set()
+
+    def wants(self, path):
+        """Whether the dotted field path will be serialized"""
+        fields = self.requested_fields
+        if fields is None:
+            return True
+        return any(
+            field == path or field.startswith(path + '.') or path.startswith(field + '.')
+            for field in fields
+        )
+
+    def expands(self, path):
+        return path in self.requested_expansions and self.wants(path)
+
+    def only_fields(self, concrete):
+        """Model columns to load for the requested top-level fields, or None for all"""
+        fields = self.requested_fields
+        if fields is None:
+            return None
+        return {'id'} | (set(concrete) & {field.partition('.')[0] for field in fields})
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in permissions.SAFE_METHODS:
+            kwargs.setdefault('fields', self.requested_fields)
+            kwargs.setdefault('expand', self.requested_expansions)
+        return super().get_serializer(*args, **kwargs)
+
+class CategoryViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
-    def get_queryset(self): return Category.objects.filter(user=self.request.user)
+    data_modules = ('finance',)
+
+    def get_queryset(self):
+        queryset = Category.objects.filter(user=self.request.user)
+        only = self.only_fields(['user', 'name', 'created_at'])
+        return queryset.only(*only) if only else queryset
+
     def perform_create(self, serializer): serializer.save(user=self.request.user)
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     serializer_class = ItemSerializer
     permission_classes = [permissions.IsAuthenticated]
-    def get_queryset(self): return Item.objects.filter(user=self.request.user)
+    data_modules = ('finance',)
+
+    def get_queryset(self):
+        queryset = Item.objects.filter(user=self.request.user)
+        if self.expands('category') or self.wants('category_name'):
+            queryset = queryset.select_related('category')
+        only = self.only_fields(['user', 'category', 'name'])
+        if only and not self.expands('category'):
+            if self.wants('category_name'):
+                only |= {'category', 'category__name'}
+            queryset = queryset.only(*only)
+        return queryset
+
     def perform_create(self, serializer): serializer.save(user=self.request.user)
 
-class DailyExpenseViewSet(viewsets.ModelViewSet):
+class DailyExpenseViewSet(ConditionalGetMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
+    """
+    List/retrieve honour ?fields= and ?expand= (e.g. fields=date,expenses.amount or
+    expand=expenses.item). ?compact=true lists flat per-day totals without line items.
+    """
     serializer_class = DailyExpenseSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'date'
+    data_modules = ('finance',)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date', '-id')
 
     def get_queryset(self):
-        return DailyExpense.objects.filter(user=self.request.user)
+        queryset = DailyExpense.objects.filter(user=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = self.with_requested_relations(queryset)
+        return queryset
+
+    def with_requested_relations(self, queryset):
+        """Prefetch nested expenses (and their item/category) only when they are rendered"""
+        only = self.only_fields(['date', 'created_at'])
+        if only:
+            queryset = queryset.only(*only)
+        if not self.wants('expenses'):
+            return queryset
+
+        related = []
+        if self.wants('expenses.category_name') or self.expands('expenses.item'):
+            related.append('item__category')
+        elif self.wants('expenses.item_name'):
+            related.append('item')
+        return queryset.prefetch_related(
+            Prefetch('expenses', queryset=ExpenseItem.objects.select_related(*related))
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('compact', '').lower() not in ('1', 'true', 'yes'):
+            return super().list(request, *args, **kwargs)
+
+        queryset = DailyExpense.objects.filter(user=request.user)
+        start = request.query_params.get('start_date')
+        end = request.query_params.get('end_date')
+        if start: queryset = queryset.filter(date__gte=start)
+        if end: queryset = queryset.filter(date__lte=end)
+
+        # Day totals come from the rollup table, not from the individual line items
+        queryset = queryset.annotate(
+            total=Coalesce(Sum('rollups__total'), Decimal('0.00')),
+            entries=Coalesce(Sum('rollups__entry_count'), 0),
+        ).values('id', 'date', 'total', 'entries')
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(DailyExpenseCompactSerializer(page, many=True).data)
+        return Response(DailyExpenseCompactSerializer(queryset, many=True).data)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def add_item(self, request, date=None):
         daily_expense = self.get_object()
         item_id = request.data.get('item')
@@ -44,21 +177,83 @@ class DailyExpenseViewSet(viewsets.ModelViewSet):
         except Item.DoesNotExist:
             return Response({'error': 'Invalid item'}, status=400)
 
+        # The post_save signal refreshes ExpenseRollup inside this transaction
         ExpenseItem.objects.create(daily_expense=daily_expense, item=item, amount=amount)
+        daily_expense = self.with_requested_relations(
+            DailyExpense.objects.filter(pk=daily_expense.pk)
+        ).get()
         return Response(self.get_serializer(daily_expense).data)
 
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Adds many expense rows across many dates in one transaction.
+        Body: {"rows": [{"date": "2026-01-10", "item": 3, "amount": "40.00"}, ...]}
+        Response: {"created": 2, "days_created": 1, "dates": ["2026-01-10"], "total": 70.0, "ids": [...]}
+        """
+        rows = request.data.get('rows') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'rows must be a non-empty list'}, status=400)
+        if len(rows) > MAX_BATCH_ROWS:
+            return Response({'error': f'At most {MAX_BATCH_ROWS} rows per batch'}, status=400)
+
+        serializer = ExpenseBatchRowSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            return Response({'error': 'Invalid rows', 'rows': serializer.errors}, status=400)
+        rows = serializer.validated_data
+
+        # Item ownership for the whole batch in one query
+        item_ids = {row['item'] for row in rows}
+        owned = set(Item.objects.filter(user=request.user, id__in=item_ids).values_list('id', flat=True))
+        invalid = sorted(item_ids - owned)
+        if invalid:
+            return Response({'error': 'Invalid item', 'items': invalid}, status=400)
+
+        dates = {row['date'] for row in rows}
+        with transaction.atomic():
+            existing = dict(DailyExpense.objects.filter(
+                user=request.user, date__in=dates
+            ).values_list('date', 'id'))
+            missing = dates - existing.keys()
+            if missing:
+                DailyExpense.objects.bulk_create(
+                    [DailyExpense(user=request.user, date=day) for day in missing],
+                    ignore_conflicts=True
+                )
+                existing = dict(DailyExpense.objects.filter(
+                    user=request.user, date__in=dates
+                ).values_list('date', 'id'))
+
+            created = ExpenseItem.objects.bulk_create([
+                ExpenseItem(daily_expense_id=existing[row['date']], item_id=row['item'], amount=row['amount'])
+                for row in rows
+            ], batch_size=500)
+            # bulk_create skips post_save, so refresh rollups and bump the data version here
+            refresh_rollups({(existing[row['date']], row['item']) for row in rows})
+            bump_data_version(request.user.pk, 'finance')
+
+        return Response({
+            'created': len(created),
+            'days_created': len(missing),
+            'dates': sorted(dates),
+            'total': float(sum(row['amount'] for row in rows)),
+            'ids': [expense.pk for expense in created],
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'])
+    @cached_response('finance')
     def reports(self, request):
-        qs = ExpenseItem.objects.filter(daily_expense__user=request.user)
+        # Read pre-aggregated buckets instead of re-joining every ExpenseItem
+        qs = ExpenseRollup.objects.filter(user=request.user)
         
         start = request.query_params.get('start_date')
         end = request.query_params.get('end_date')
-        if start: qs = qs.filter(daily_expense__date__gte=start)
-        if end: qs = qs.filter(daily_expense__date__lte=end)
+        if start: qs = qs.filter(date__gte=start)
+        if end: qs = qs.filter(date__lte=end)
 
-        category_data = qs.values(name=F('item__category__name')).annotate(value=Sum('amount')).order_by('-value')
-        daily_data = qs.values(date=F('daily_expense__date')).annotate(value=Sum('amount')).order_by('date')
-        monthly_data = qs.annotate(month=TruncMonth('daily_expense__date')).values('month').annotate(value=Sum('amount')).order_by('month')
+        category_data = qs.values(name=F('category__name')).annotate(value=Sum('total')).order_by('-value')
+        daily_data = qs.values('date').annotate(value=Sum('total')).order_by('date')
+        monthly_data = qs.annotate(month=TruncMonth('date')).values('month').annotate(value=Sum('total')).order_by('month')
 
         return Response({
             'category_distribution': [{'name': x['name'], 'value': float(x['value'] or 0)} for x in category_data],
@@ -67,6 +262,7 @@ class DailyExpenseViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @cached_response('finance')
     def monthly_bar_chart(self, request):
         """
         Returns 12-month expense data for bar chart.
@@ -79,21 +275,21 @@ class DailyExpenseViewSet(viewsets.ModelViewSet):
         year = request.query_params.get('year', datetime.now().year)
         year = int(year)
         
-        # Get all expense items for the specified year
-        qs = ExpenseItem.objects.filter(
-            daily_expense__user=request.user,
-            daily_expense__date__year=year
+        # Get rollup buckets for the specified year
+        qs = ExpenseRollup.objects.filter(
+            user=request.user,
+            date__year=year
         )
         
         # Aggregate by month
         monthly_totals = qs.annotate(
-            month_num=TruncMonth('daily_expense__date')
+            month_num=TruncMonth('date')
         ).values('month_num').annotate(
-            total=Sum('amount')
+            month_total=Sum('total')
         ).order_by('month_num')
         
         # Create a lookup dictionary
-        month_lookup = {item['month_num'].month: float(item['total']) for item in monthly_totals}
+        month_lookup = {item['month_num'].month: float(item['month_total']) for item in monthly_totals}
         
         # Build complete 12-month array with zeros for missing months
         result = []
@@ -107,6 +303,7 @@ class DailyExpenseViewSet(viewsets.ModelViewSet):
         return Response(result)
 
     @action(detail=False, methods=['get'])
+    @cached_response('finance')
     def category_pie_chart(self, request):
         """
         Returns category-wise expense breakdown for a specific month.
@@ -120,36 +317,38 @@ class DailyExpenseViewSet(viewsets.ModelViewSet):
         year = int(year)
         month = int(month)
         
-        # Get expense items for the specified month
-        qs = ExpenseItem.objects.filter(
-            daily_expense__user=request.user,
-            daily_expense__date__year=year,
-            daily_expense__date__month=month
+        # Get rollup buckets for the specified month
+        qs = ExpenseRollup.objects.filter(
+            user=request.user,
+            date__year=year,
+            date__month=month
         )
         
         # Aggregate by category
         category_totals = qs.values(
-            category=F('item__category__name')
+            category_label=F('category__name')
         ).annotate(
-            total=Sum('amount')
+            category_total=Sum('total')
         ).filter(
-            total__gt=0  # Only categories with expenses > 0
-        ).order_by('-total')
+            category_total__gt=0  # Only categories with expenses > 0
+        ).order_by('-category_total')
         
         result = [
-            {'category': item['category'], 'total': float(item['total'])}
+            {'category': item['category_label'], 'total': float(item['category_total'])}
             for item in category_totals
         ]
         
         return Response(result)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    @cached_response('finance')
     def tabular_report(self, request):
         """
         Returns pivot-table style report with items as columns.
         Query params: 
             - start_date, end_date (required)
             - group_by: 'daily' or 'monthly' (required)
+            - format: 'csv' or 'ndjson' to stream the pivot instead of returning JSON
         Response: {
             "columns": ["Date/Month", "Egg", "Milk", "Cinema", "Total"],
             "rows": [
@@ -158,9 +357,6 @@ class DailyExpenseViewSet(viewsets.ModelViewSet):
             ]
         }
         """
-        from datetime import datetime
-        from collections import defaultdict
-        
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         group_by = request.query_params.get('group_by', 'daily')  # 'daily' or 'monthly'
@@ -168,73 +364,26 @@ class DailyExpenseViewSet(viewsets.ModelViewSet):
         if not start_date or not end_date:
             return Response({'error': 'start_date and end_date are required'}, status=400)
         
-        # Get all expense items in date range
-        qs = ExpenseItem.objects.filter(
-            daily_expense__user=request.user,
-            daily_expense__date__gte=start_date,
-            daily_expense__date__lte=end_date
-        ).select_related('item', 'daily_expense')
-        
-        # Get all unique items for columns
-        all_items = Item.objects.filter(user=request.user).order_by('name')
-        item_names = [item.name for item in all_items]
-        
-        # Build data structure
-        rows_dict = defaultdict(lambda: defaultdict(float))
-        
-        if group_by == 'daily':
-            # Group by date
-            for expense_item in qs:
-                date_key = expense_item.daily_expense.date.strftime('%Y-%m-%d')
-                item_name = expense_item.item.name
-                rows_dict[date_key][item_name] += float(expense_item.amount)
-            
-            # Sort by date
-            sorted_keys = sorted(rows_dict.keys())
-            
-            rows = []
-            for date_key in sorted_keys:
-                row = {'date': date_key}
-                total = 0.0
-                for item_name in item_names:
-                    value = rows_dict[date_key].get(item_name, 0.0)
-                    row[item_name] = value
-                    total += value
-                row['total'] = total
-                rows.append(row)
-            
-            columns = ['Date'] + item_names + ['Total']
-            
-        else:  # monthly
-            # Group by month
-            for expense_item in qs:
-                date = expense_item.daily_expense.date
-                month_key = f"{date.year}-{date.month:02d}"
-                item_name = expense_item.item.name
-                rows_dict[month_key][item_name] += float(expense_item.amount)
-            
-            # Sort by month
-            sorted_keys = sorted(rows_dict.keys())
-            
-            rows = []
-            from calendar import month_name
-            for month_key in sorted_keys:
-                year, month = month_key.split('-')
-                month_label = f"{month_name[int(month)]} {year}"
-                
-                row = {'month': month_label, 'month_key': month_key}
-                total = 0.0
-                for item_name in item_names:
-                    value = rows_dict[month_key].get(item_name, 0.0)
-                    row[item_name] = value
-                    total += value
-                row['total'] = total
-                rows.append(row)
-            
-            columns = ['Month'] + item_names + ['Total']
+        fmt = request.accepted_renderer.format
+        if fmt in ('csv', 'ndjson'):
+            return stream_tabular_report(request.user, start_date, end_date, group_by, fmt)
         
-        return Response({
-            'columns': columns,
-            'rows': rows,
-            'group_by': group_by
-        })
+        return Response(build_tabular_report(request.user, start_date, end_date, group_by))
+
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """
+        Streams every expense line item as CSV (default) or NDJSON.
+        Query params: start_date, end_date (optional), format: 'csv' or 'ndjson'
+        Columns: id, date, item, item_name, category_name, amount
+        """
+        fmt = request.accepted_renderer.format
+        if fmt not in ('csv', 'ndjson'):
+            fmt = 'csv'
+        
+        return stream_expense_items(
+            request.user,
+            request.query_params.get('start_date'),
+            request.query_params.get('end_date'),
+            fmt
+        )
@@ -5,33 +5,26 @@ import { ArrowUpRight, ArrowDownLeft, CreditCard } from 'lucide-react';
 
 const Dashboard = () => {
     const [stats, setStats] = useState({ expense: 0, debt: 0, emis: 0 });
+    const [topCategories, setTopCategories] = useState([]);
+    const [dueThisWeek, setDueThisWeek] = useState([]);
+    const [overdue, setOverdue] = useState({ count: 0, total: 0 });
     const [user, setUser] = useState('');
     const navigate = useNavigate();
 
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const [repRes, debtRes, emiRes] = await Promise.all([
-                    api.get('expenses/reports/'),
-                    api.get('debts/summary/'),
-                    api.get('emis/')
-                ]);
-
-                // Calculate current month expense
-                const currentMonth = new Date().toISOString().slice(0, 7) + '-01'; // Roughly matching TruncMonth output format which is datetime
-                // Actually TruncMonth returns formatted date usually or datetime.
-                // The API /reports returns list... let's assume we sum last month or something.
-                // For simplicity, I'll just sum all for "Total Lifetime" for now, or check monthly_trend.
-                const lastMonth = repRes.data.monthly_trend.length > 0 ? repRes.data.monthly_trend[repRes.data.monthly_trend.length - 1].value : 0;
-
-                const pendingDebt = debtRes.data.by_status.find(s => s.status === 'PENDING')?.total || 0;
-                const activeEmis = emiRes.data.count ?? (emiRes.data.results ? emiRes.data.results.length : emiRes.data.length);
+                // One request: finance, debt and EMI KPIs are computed together on the server
+                const { data } = await api.get('dashboard/');
 
                 setStats({
-                    expense: lastMonth,
-                    debt: pendingDebt,
-                    emis: activeEmis
+                    expense: data.finance.month_to_date,
+                    debt: data.debts.net_position,
+                    emis: data.emis.active_count
                 });
+                setTopCategories(data.finance.top_categories);
+                setDueThisWeek(data.emis.due_this_week);
+                setOverdue({ count: data.emis.overdue_count, total: data.emis.overdue_total });
             } catch (e) {
                 console.error(e);
             }
@@ -62,7 +55,7 @@ const Dashboard = () => {
                         <ArrowDownLeft size={24} />
                     </div>
                     <div>
-                        <div style={{ color: 'var(--text-secondary)' }}>Pending Debts</div>
+                        <div style={{ color: 'var(--text-secondary)' }}>Net Debt Position</div>
                         <div style={{ fontSize: '1.8rem', fontWeight: 'bold' }}>${stats.debt}</div>
                     </div>
                 </div>
@@ -78,6 +71,37 @@ const Dashboard = () => {
                 </div>
             </div>
 
+            <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(300px, 1fr))', gap: '1.5rem', marginBottom: '3rem' }}>
+                <div className="glass-panel" style={{ padding: '1.5rem' }}>
+                    <h3 style={{ marginBottom: '1rem' }}>Top Categories (This Month)</h3>
+                    {topCategories.length === 0 ? (
+                        <p style={{ opacity: 0.5 }}>No expenses this month.</p>
+                    ) : topCategories.map(cat => (
+                        <div key={cat.id} style={{ display: 'flex', justifyContent: 'space-between', padding: '0.4rem 0' }}>
+                            <span>{cat.name}</span>
+                            <span>${cat.total.toLocaleString()}</span>
+                        </div>
+                    ))}
+                </div>
+
+                <div className="glass-panel" style={{ padding: '1.5rem' }}>
+                    <h3 style={{ marginBottom: '1rem' }}>Due This Week</h3>
+                    {overdue.count > 0 && (
+                        <p style={{ color: '#ef4444', marginTop: 0 }}>
+                            {overdue.count} overdue · ${overdue.total.toLocaleString()}
+                        </p>
+                    )}
+                    {dueThisWeek.length === 0 ? (
+                        <p style={{ opacity: 0.5 }}>Nothing due this week.</p>
+                    ) : dueThisWeek.map(inst => (
+                        <div key={`${inst.emi_id}-${inst.installment_number}`} style={{ display: 'flex', justifyContent: 'space-between', padding: '0.4rem 0' }}>
+                            <span>{inst.emi_title} #{inst.installment_number} · {inst.due_date}</span>
+                            <span>${inst.amount.toLocaleString()}</span>
+                        </div>
+                    ))}
+                </div>
+            </div>
+
             <h3>Quick Actions</h3>
             <div style={{ display: 'flex', gap: '1rem' }}>
                 <button onClick={() => navigate('/expenses')} style={actionBtnStyle}>Add Expense</button>
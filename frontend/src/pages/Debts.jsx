@@ -13,6 +13,18 @@ const Debts = () => {
     const [selectedDebt, setSelectedDebt] = useState(null);
     const [showAddModal, setShowAddModal] = useState(false);
 
+    // The debt list is cursor-paginated: follow `next` until the last page
+    const fetchAllPages = async (url) => {
+        const rows = [];
+        let next = url;
+        while (next) {
+            const res = await api.get(next);
+            rows.push(...res.data.results);
+            next = res.data.next;
+        }
+        return rows;
+    };
+
     // Fetch data on mount and when filter changes
     useEffect(() => {
         fetchAllData();
@@ -22,13 +34,13 @@ const Debts = () => {
         try {
             const personParam = selectedPerson ? `?person=${selectedPerson}` : '';
 
-            const [debtsRes, personsRes, summaryRes] = await Promise.all([
-                api.get(`debts/${personParam}`),
+            const [debtList, personsRes, summaryRes] = await Promise.all([
+                fetchAllPages(`debts/${personParam}`),
                 api.get('debts/persons/'),
                 api.get(`debts/summary/${personParam}`)
             ]);
 
-            setDebts(debtsRes.data.results || []);
+            setDebts(debtList);
             setPersons(personsRes.data.persons || []);
             setSummary(summaryRes.data);
         } catch (error) {
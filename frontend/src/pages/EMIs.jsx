@@ -34,7 +34,7 @@ const EMIs = () => {
     const fetchData = async () => {
         setLoading(true);
         try {
-            const res = await api.get('emis/');
+            const res = await api.get('emis/', { params: { summary: true } });
             setEmis(res.data.results || res.data);
         } catch (err) {
             console.error('Failed to fetch EMIs', err);
@@ -71,9 +71,14 @@ const EMIs = () => {
         }
     };
 
-    const handlePay = async (instId) => {
+    const handlePay = async (emiId, inst) => {
         try {
-            await api.post(`installments/${instId}/mark_paid/`);
+            // Lazy schedules list pending installments that are not stored yet (no id)
+            if (inst.id) {
+                await api.post(`installments/${inst.id}/mark_paid/`);
+            } else {
+                await api.post(`emis/${emiId}/pay_installment/`, { installment_number: inst.installment_number });
+            }
             fetchData();
         } catch (err) {
             alert(err.response?.data?.error || 'Failed to mark as paid');
@@ -139,9 +144,17 @@ const EMIs = () => {
 };
 
 const EMICard = ({ emi, isExpanded, onToggle, onPay }) => {
-    const paidCount = emi.installments.filter(i => i.status === 'PAID').count || emi.installments.filter(i => i.status === 'PAID').length;
+    const [installments, setInstallments] = useState([]);
     const isCompleted = emi.status === 'COMPLETED';
 
+    // The summary list carries no schedule; load it when the card opens and after each payment
+    useEffect(() => {
+        if (!isExpanded) return;
+        api.get(`emis/${emi.id}/installments/`, { params: { page_size: 500 } })
+            .then(res => setInstallments(res.data.results))
+            .catch(err => console.error('Failed to fetch installments', err));
+    }, [isExpanded, emi.id, emi.paid_count]);
+
     return (
         <div className="glass-panel" style={{
             padding: '1.5rem',
@@ -179,7 +192,7 @@ const EMICard = ({ emi, isExpanded, onToggle, onPay }) => {
                         <span style={{ fontSize: '0.8rem', opacity: 0.6, marginLeft: '0.4rem' }}>remaining of ₹{parseFloat(emi.total_amount).toLocaleString()}</span>
                     </div>
                     <div style={{ display: 'flex', justifyContent: 'space-between', marginBottom: '0.4rem', fontSize: '0.8rem', fontWeight: '600' }}>
-                        <span>Progress: {paidCount}/{emi.total_installments} Paid</span>
+                        <span>Progress: {emi.paid_count}/{emi.total_installments} Paid</span>
                         <span>{emi.progress}%</span>
                     </div>
                     <div style={{ height: '8px', background: 'rgba(255,255,255,0.05)', borderRadius: '10px', overflow: 'hidden' }}>
@@ -206,16 +219,16 @@ const EMICard = ({ emi, isExpanded, onToggle, onPay }) => {
                                 <Clock size={18} /> Pending Installments
                             </h4>
                             <div style={{ display: 'flex', flexDirection: 'column', gap: '0.75rem' }}>
-                                {emi.installments.filter(i => i.status === 'PENDING').length === 0 ? (
+                                {installments.filter(i => i.status === 'PENDING').length === 0 ? (
                                     <p style={{ opacity: 0.5, fontSize: '0.9rem' }}>No pending installments.</p>
-                                ) : emi.installments.filter(i => i.status === 'PENDING').map(inst => (
-                                    <div key={inst.id} style={installmentStyle}>
+                                ) : installments.filter(i => i.status === 'PENDING').map(inst => (
+                                    <div key={inst.installment_number} style={installmentStyle}>
                                         <div>
                                             <div style={{ fontWeight: 'bold' }}>₹{parseFloat(inst.amount).toLocaleString()}</div>
                                             <div style={{ fontSize: '0.75rem', opacity: 0.7 }}>Due: {inst.due_date}</div>
                                         </div>
                                         <button
-                                            onClick={(e) => { e.stopPropagation(); onPay(inst.id); }}
+                                            onClick={(e) => { e.stopPropagation(); onPay(emi.id, inst); }}
                                             style={payBtnStyle}
                                         >
                                             Mark as Paid
@@ -231,9 +244,9 @@ const EMICard = ({ emi, isExpanded, onToggle, onPay }) => {
                                 <CheckCircle size={18} /> Completed
                             </h4>
                             <div style={{ display: 'flex', flexDirection: 'column', gap: '0.75rem' }}>
-                                {emi.installments.filter(i => i.status === 'PAID').length === 0 ? (
+                                {installments.filter(i => i.status === 'PAID').length === 0 ? (
                                     <p style={{ opacity: 0.5, fontSize: '0.9rem' }}>No installments paid yet.</p>
-                                ) : emi.installments.filter(i => i.status === 'PAID').reverse().map(inst => (
+                                ) : installments.filter(i => i.status === 'PAID').reverse().map(inst => (
                                     <div key={inst.id} style={{ ...installmentStyle, background: 'rgba(16, 185, 129, 0.05)', borderColor: 'rgba(16, 185, 129, 0.1)' }}>
                                         <div>
                                             <div style={{ fontWeight: 'bold', color: 'var(--success)' }}>₹{parseFloat(inst.amount).toLocaleString()}</div>